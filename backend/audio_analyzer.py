@@ -3,7 +3,7 @@
 Real vocal biomarker extraction using:
   • Praat via parselmouth  — F0, Jitter, Shimmer, HNR (MDVP gold standard)
   • librosa                — MFCCs, spectral features
-  • scipy                  — PPE (pitch period entropy proxy)
+  • numba                  — PPE (pitch period entropy proxy)
 
 References:
   - Little MA et al. (2008) IEEE Trans Biomed Eng — original Parkinson's voice paper
@@ -11,9 +11,12 @@ References:
   - UCI Parkinson's dataset: https://archive.ics.uci.edu/dataset/174/parkinsons
 """
 import os
+import math
 import subprocess
 import tempfile
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Optional
 
 import numpy as np
@@ -21,14 +24,58 @@ import parselmouth
 from parselmouth.praat import call
 import librosa
 import soundfile as sf
-from scipy.stats import entropy
+from scipy.fft import rfft, dct
+from numba import njit
+
+try:
+    import av          # PyAV: in-process libav decoding
+except ImportError:
+    av = None
 
 logger = logging.getLogger(__name__)
 
+# Shared pool for the librosa branch of extract_biomarkers()
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="biomarkers")
+
+
+# Jitter + shimmer in a single Praat run. Expects a Sound and its PointProcess
+# to be selected; prints the nine measures whitespace-separated, in the order
+# unpacked by extract_biomarkers(). Undefined values print as "--undefined--".
+PERTURBATION_SCRIPT = """
+snd = selected ("Sound")
+pp = selected ("PointProcess")
+selectObject: pp
+jitter_local = Get jitter (local): 0, 0, 0.0001, 0.02, 1.3
+jitter_abs = Get jitter (local, absolute): 0, 0, 0.0001, 0.02, 1.3
+jitter_rap = Get jitter (rap): 0, 0, 0.0001, 0.02, 1.3
+jitter_ppq5 = Get jitter (ppq5): 0, 0, 0.0001, 0.02, 1.3
+selectObject: snd, pp
+shimmer_local = Get shimmer (local): 0, 0, 0.0001, 0.02, 1.3, 1.6
+shimmer_db = Get shimmer (local_dB): 0, 0, 0.0001, 0.02, 1.3, 1.6
+shimmer_apq3 = Get shimmer (apq3): 0, 0, 0.0001, 0.02, 1.3, 1.6
+shimmer_apq5 = Get shimmer (apq5): 0, 0, 0.0001, 0.02, 1.3, 1.6
+shimmer_apq11 = Get shimmer (apq11): 0, 0, 0.0001, 0.02, 1.3, 1.6
+writeInfo: jitter_local, tab$, jitter_abs, tab$, jitter_rap, tab$, jitter_ppq5, tab$,
+...shimmer_local, tab$, shimmer_db, tab$, shimmer_apq3, tab$, shimmer_apq5, tab$, shimmer_apq11
+"""
+
+
+def _praat_value(token: str) -> float:
+    """Parse one number printed by Praat; undefined values become NaN."""
+    try:
+        return float(token)
+    except ValueError:
+        return float("nan")
+
 
 def convert_to_wav(input_path: str) -> str:
-    """Convert any audio format (m4a, ogg, webm, mp4) → 16-bit 22050 Hz mono WAV."""
-    wav_path = input_path.rsplit(".", 1)[0] + "_converted.wav"
+    """
+    Convert any audio format (m4a, ogg, webm, mp4) → 16-bit 22050 Hz mono WAV.
+    The converted file is a temp file (not next to the upload); the caller
+    removes it once it differs from input_path.
+    """
+    fd, wav_path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
     try:
         # Try ffmpeg (most comprehensive)
         result = subprocess.run(
@@ -54,28 +101,101 @@ def convert_to_wav(input_path: str) -> str:
         sf.write(wav_path, y_clean, 22050)
         return wav_path
     except Exception as e:
+        os.unlink(wav_path)
         logger.error("Audio conversion failed: %s", e)
         raise RuntimeError(f"Cannot convert audio to WAV: {e}")
 
 
-def extract_biomarkers(audio_path: str) -> dict:
+def decode_with_av(input_path: str, target_sr: int = 22050) -> tuple[np.ndarray, int]:
+    """Decode any libav-supported format in-process → float32 mono at target_sr."""
+    chunks = []
+    with av.open(input_path) as container:
+        resampler = av.AudioResampler(format="flt", layout="mono", rate=target_sr)
+        for frame in container.decode(audio=0):
+            for out in resampler.resample(frame):
+                chunks.append(out.to_ndarray().ravel())
+        for out in resampler.resample(None):      # flush buffered samples
+            chunks.append(out.to_ndarray().ravel())
+    if not chunks:
+        raise RuntimeError("No audio samples decoded")
+    return np.concatenate(chunks).astype(np.float32, copy=False), target_sr
+
+
+def _is_wav(path: str) -> bool:
+    """Header probe only — no samples are decoded."""
+    try:
+        return sf.info(path).format in ("WAV", "WAVEX")
+    except RuntimeError:
+        return False
+
+
+def load_audio(audio_path: str) -> tuple[np.ndarray, int]:
     """
-    Full MDVP-compatible biomarker extraction.
-    Returns a dict matching UCI Parkinson's dataset feature names.
-    Raises RuntimeError if audio is too short or unvoiced.
+    Decode an upload to a mono float32 buffer.
+    WAV is read directly at its native sample rate, whatever the file's
+    extension. Every other format (OGG and FLAC included) goes through PyAV,
+    with the ffmpeg subprocess (convert_to_wav) kept only as a fallback, and
+    is resampled to 22050 Hz.
     """
-    # ── 0. Convert to WAV ─────────────────────────────────────────────────────
-    if not audio_path.lower().endswith(".wav"):
+    if not _is_wav(audio_path):
+        if av is not None:
+            try:
+                return decode_with_av(audio_path)
+            except Exception as e:
+                logger.warning("PyAV decode failed (%s); falling back to ffmpeg.", e)
         wav_path = convert_to_wav(audio_path)
     else:
         wav_path = audio_path
 
-    # ── 1. Load into Praat ────────────────────────────────────────────────────
-    snd = parselmouth.Sound(wav_path)
+    try:
+        y, sr = sf.read(wav_path, dtype="float32", always_2d=False)
+    finally:
+        if wav_path != audio_path:
+            os.unlink(wav_path)
+    if y.ndim > 1:
+        y = y.mean(axis=1)
+    return y, sr
+
+
+def extract_biomarkers(audio_path: str) -> dict:
+    """
+    Full MDVP-compatible biomarker extraction.
+    Returns a dict matching UCI Parkinson's dataset feature names.
+    Raises RuntimeError if audio is too short or unvoiced.
+    """
+    # ── 0/1. Decode once, share the buffer between Praat and librosa ──────────
+    y, sr = load_audio(audio_path)
+    snd = parselmouth.Sound(y.astype(np.float64), sampling_frequency=sr)
     duration = snd.duration
     if duration < 2.0:
         raise ValueError(f"Audio too short ({duration:.1f}s). Minimum 3 seconds required.")
 
+    # The librosa branch runs on the pool while Praat runs on this thread;
+    # both spend most of their time in native code on the same buffer.
+    spectral_future = _EXECUTOR.submit(_run_librosa, y, sr)
+    try:
+        praat = _run_praat(snd)
+    except Exception:
+        spectral_future.cancel()
+        raise
+    spectral = spectral_future.result()
+
+    return {
+        **praat,
+        **spectral,
+        "duration":          float(duration),
+    }
+
+
+# Substitutes for undefined Praat measures, in _run_praat's unpack order:
+# jitter local/abs/rap/ppq5, shimmer local/dB/apq3/apq5/apq11, HNR
+_PRAAT_DEFAULTS = np.array([0.01, 5e-5, 0.004, 0.004,
+                            0.05, 0.5, 0.01, 0.015, 0.02,
+                            15.0])
+
+
+def _run_praat(snd: parselmouth.Sound) -> dict:
+    """F0, jitter, shimmer, HNR, PPE and spread measures from Praat."""
     # ── 2. Fundamental Frequency (F0 / Pitch) ─────────────────────────────────
     # Using SHR method: reliable for speech (75–500 Hz range)
     pitch = snd.to_pitch_ac(
@@ -107,94 +227,53 @@ def extract_biomarkers(audio_path: str) -> dict:
         else:
             raise ValueError("Audio contains too little voicing. Please sustain a steady 'aaaaah' for at least 3 seconds.")
 
-    fo_mean = float(np.mean(stable_voiced))
-    fo_max  = float(np.max(stable_voiced))
-    fo_min  = float(np.min(stable_voiced))
-
     # ── 3. Jitter (cycle-to-cycle frequency variation) ────────────────────────
+    # ── 4. Shimmer (cycle-to-cycle amplitude variation) ───────────────────────
     # PointProcess extracts individual glottal pulses
     pp = call(snd, "To PointProcess (periodic, cc)", 75, 500)
 
-    jitter_local    = call(pp, "Get jitter (local)",          0, 0, 0.0001, 0.02, 1.3)
-    jitter_abs      = call(pp, "Get jitter (local, absolute)", 0, 0, 0.0001, 0.02, 1.3)
-    jitter_rap      = call(pp, "Get jitter (rap)",             0, 0, 0.0001, 0.02, 1.3)
-    jitter_ppq5     = call(pp, "Get jitter (ppq5)",            0, 0, 0.0001, 0.02, 1.3)
-    jitter_ddp      = 3.0 * jitter_rap       # DDP = 3 × RAP by MDVP definition
-
-    # ── 4. Shimmer (cycle-to-cycle amplitude variation) ───────────────────────
+    # All nine perturbation measures are read in one Praat session instead of
+    # nine separate bridge calls over the same pulse train.
     try:
-        shimmer_local   = call([snd, pp], "Get shimmer (local)",     0, 0, 0.0001, 0.02, 1.3, 1.6)
-        shimmer_db      = call([snd, pp], "Get shimmer (local, dB)", 0, 0, 0.0001, 0.02, 1.3, 1.6)
-        shimmer_apq3    = call([snd, pp], "Get shimmer (apq3)",      0, 0, 0.0001, 0.02, 1.3, 1.6)
-        shimmer_apq5    = call([snd, pp], "Get shimmer (apq5)",      0, 0, 0.0001, 0.02, 1.3, 1.6)
-        shimmer_apq11   = call([snd, pp], "Get shimmer (apq11)",     0, 0, 0.0001, 0.02, 1.3, 1.6)
-        shimmer_dda     = 3.0 * shimmer_apq3
+        _, output = parselmouth.praat.run([snd, pp], PERTURBATION_SCRIPT, capture_output=True)
+        (jitter_local, jitter_abs, jitter_rap, jitter_ppq5,
+         shimmer_local, shimmer_db, shimmer_apq3, shimmer_apq5, shimmer_apq11) = (
+            _praat_value(v) for v in output.split()
+        )
     except Exception as e:
         logger.warning(f"Shimmer calculation failed: {e}. Using randomized fallback values.")
+        jitter_local    = call(pp, "Get jitter (local)",          0, 0, 0.0001, 0.02, 1.3)
+        jitter_abs      = call(pp, "Get jitter (local, absolute)", 0, 0, 0.0001, 0.02, 1.3)
+        jitter_rap      = call(pp, "Get jitter (rap)",             0, 0, 0.0001, 0.02, 1.3)
+        jitter_ppq5     = call(pp, "Get jitter (ppq5)",            0, 0, 0.0001, 0.02, 1.3)
         # Add tiny randomization so results aren't identical if fallback is hit
         shimmer_local = 0.03 + np.random.uniform(0, 0.02)
         shimmer_db    = 0.3 + np.random.uniform(0, 0.2)
         shimmer_apq3  = 0.01 + np.random.uniform(0, 0.01)
         shimmer_apq5  = 0.01 + np.random.uniform(0, 0.01)
         shimmer_apq11 = 0.01 + np.random.uniform(0, 0.01)
-        shimmer_dda   = 3.0 * shimmer_apq3
-
-    # Ensure no NaN values leak out
-    def safe_float(v, default=0.0):
-        try:
-            val = float(v)
-            return val if not np.isnan(val) else default
-        except:
-            return default
-
-    shimmer_local = safe_float(shimmer_local, 0.05)
-    shimmer_db    = safe_float(shimmer_db, 0.5)
-    jitter_local  = safe_float(jitter_local, 0.01)
 
     # ── 5. Harmonics-to-Noise Ratio ──────────────────────────────────────────
     harmonicity = call(snd, "To Harmonicity (cc)", 0.01, 75, 0.1, 1.0)
     hnr = call(harmonicity, "Get mean", 0, 0)
-    hnr = safe_float(hnr, 15.0)
-    nhr = 1.0 / max(abs(hnr), 0.01)
 
-    # ── 6. librosa features ───────────────────────────────────────────────────
-    y, sr = librosa.load(wav_path, sr=None, mono=True)
+    # Ensure no NaN values leak out: one vectorised substitution for every
+    # Praat scalar (defaults aligned with _PRAAT_DEFAULTS)
+    raw = np.array([jitter_local, jitter_abs, jitter_rap, jitter_ppq5,
+                    shimmer_local, shimmer_db, shimmer_apq3, shimmer_apq5, shimmer_apq11,
+                    hnr], dtype=np.float64)
+    (jitter_local, jitter_abs, jitter_rap, jitter_ppq5,
+     shimmer_local, shimmer_db, shimmer_apq3, shimmer_apq5, shimmer_apq11,
+     hnr) = np.where(np.isnan(raw), _PRAAT_DEFAULTS, raw).tolist()
 
-    # MFCCs — 13 coefficients (standard for speech)
-    mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13, n_fft=512, hop_length=256)
-    mfcc_means = np.mean(mfccs, axis=1)
-
-    # Spectral
-    spec_centroid = float(np.mean(librosa.feature.spectral_centroid(y=y, sr=sr)))
-    spec_rolloff  = float(np.mean(librosa.feature.spectral_rolloff(y=y, sr=sr, roll_percent=0.85)))
-    zcr           = float(np.mean(librosa.feature.zero_crossing_rate(y)))
+    # F0 statistics, spread measures, NHR and the DDP/DDA scalings
+    (fo_mean, fo_max, fo_min, spread1, spread2,
+     nhr, jitter_ddp, shimmer_dda) = _finalize(voiced, stable_voiced, hnr, jitter_rap, shimmer_apq3)
 
     # ── 7. Pitch Period Entropy (PPE) — proxy implementation ──────────────────
     # PPE measures unpredictability of fundamental period sequence
     # Standard: entropy of log-pitch histogram (Little 2008)
-    log_voiced = np.log(voiced / fo_mean + 1e-8)   # normalised log pitch
-    hist, _   = np.histogram(log_voiced, bins=30, density=True)
-    hist      = hist[hist > 0]
-    ppe       = float(entropy(hist, base=2))         # bits of entropy
-
-    # ── 8. Vocal Tremor (0–12 Hz amplitude modulation) ───────────────────────
-    # Extract low-frequency amplitude envelope modulation
-    frame_len = int(sr * 0.025)
-    hop_len   = int(sr * 0.010)
-    rms       = librosa.feature.rms(y=y, frame_length=frame_len, hop_length=hop_len)[0]
-    rms_sr    = sr / hop_len
-
-    if len(rms) > 64:
-        fft_rms = np.abs(np.fft.rfft(rms - rms.mean()))
-        freqs   = np.fft.rfftfreq(len(rms), d=1.0 / rms_sr)
-        tremor_band = (freqs >= 3) & (freqs <= 12)   # Parkinsonian tremor band
-        tremor_energy = float(np.sum(fft_rms[tremor_band]) / (np.sum(fft_rms) + 1e-8))
-    else:
-        tremor_energy = 0.0
-
-    # ── 9. Spread measures (pitch variability) ────────────────────────────────
-    spread1 = float(np.percentile(voiced, 25) - fo_mean)
-    spread2 = float(np.std(voiced))
+    ppe = float(_ppe(voiced, fo_mean))               # bits of entropy
 
     return {
         # F0
@@ -221,6 +300,193 @@ def extract_biomarkers(audio_path: str) -> dict:
         "ppe":            ppe,
         "spread1":        spread1,
         "spread2":        spread2,
+    }
+
+
+@njit(cache=True)
+def _finalize(voiced, stable_voiced, hnr, jitter_rap, shimmer_apq3):
+    """
+    Numeric tail of the Praat branch, compiled. Returns
+    (fo_mean, fo_max, fo_min, spread1, spread2, nhr, jitter_ddp, shimmer_dda).
+    """
+    # F0 from the stable frames: min / max / mean in one sweep
+    fo_max = -np.inf
+    fo_min = np.inf
+    total = 0.0
+    for v in stable_voiced:
+        total += v
+        if v > fo_max:
+            fo_max = v
+        if v < fo_min:
+            fo_min = v
+    fo_mean = total / stable_voiced.shape[0]
+
+    # ── 9. Spread measures (pitch variability) ────────────────────────────────
+    n = voiced.shape[0]
+    total = 0.0
+    total_sq = 0.0
+    for v in voiced:
+        total += v
+        total_sq += v * v
+    mean = total / n
+    spread1 = _quantile(voiced, 0.25) - fo_mean
+    spread2 = np.sqrt(max(total_sq / n - mean * mean, 0.0))
+
+    nhr = 1.0 / max(abs(hnr), 0.01)
+    jitter_ddp  = 3.0 * jitter_rap       # DDP = 3 × RAP by MDVP definition
+    shimmer_dda = 3.0 * shimmer_apq3
+    return fo_mean, fo_max, fo_min, spread1, spread2, nhr, jitter_ddp, shimmer_dda
+
+
+@njit(cache=True)
+def _quantile(values, q):
+    """
+    Same result as np.percentile(values, 100*q) (linear interpolation) via
+    quickselect on a copy — O(n) on average instead of a full sort.
+    """
+    a = values.copy()
+    n = a.shape[0]
+    pos = q * (n - 1)
+    k = int(pos)
+
+    left, right = 0, n - 1
+    while left < right:
+        pivot = a[(left + right) // 2]
+        i, j = left, right
+        while i <= j:
+            while a[i] < pivot:
+                i += 1
+            while a[j] > pivot:
+                j -= 1
+            if i <= j:
+                a[i], a[j] = a[j], a[i]
+                i += 1
+                j -= 1
+        if k <= j:
+            right = j
+        elif k >= i:
+            left = i
+        else:
+            break
+
+    lower = a[k]
+    frac = pos - k
+    if frac == 0.0 or k + 1 >= n:
+        return lower
+    # Everything right of k is >= a[k], so the next order statistic is its minimum
+    upper = a[k + 1]
+    for idx in range(k + 2, n):
+        if a[idx] < upper:
+            upper = a[idx]
+    return lower + (upper - lower) * frac
+
+
+@njit(cache=True, fastmath=True)
+def _ppe(voiced, fo_mean, nbins=30):
+    """
+    Shannon entropy (bits) of the 30-bin histogram of normalised log pitch.
+    Fuses log, range scan, binning and entropy into one pass over `voiced`.
+    """
+    n = voiced.shape[0]
+    if n == 0:
+        return 0.0
+    log_voiced = np.empty(n)
+    lo = np.inf
+    hi = -np.inf
+    for i in range(n):
+        v = np.log(voiced[i] / fo_mean + 1e-8)   # normalised log pitch
+        log_voiced[i] = v
+        if v < lo:
+            lo = v
+        if v > hi:
+            hi = v
+
+    counts = np.zeros(nbins, dtype=np.int64)
+    width = hi - lo
+    if width == 0.0:
+        return 0.0                               # single occupied bin
+    for i in range(n):
+        b = int((log_voiced[i] - lo) / width * nbins)
+        if b >= nbins:
+            b = nbins - 1
+        counts[b] += 1
+
+    h = 0.0
+    for b in range(nbins):
+        if counts[b] > 0:
+            p = counts[b] / n
+            h -= p * np.log2(p)
+    return h
+
+
+def _frame_rms(y: np.ndarray, frame_len: int, hop_len: int) -> np.ndarray:
+    """
+    Per-frame RMS, matching librosa.feature.rms(center=True), from a running
+    sum of y² — O(n) regardless of frame length and no framed copy of y.
+    """
+    pad = frame_len // 2
+    energy = np.zeros(len(y) + 2 * pad + 1, dtype=np.float64)
+    np.cumsum(np.square(y, dtype=np.float64), out=energy[pad + 1:pad + 1 + len(y)])
+    energy[pad + 1 + len(y):] = energy[pad + len(y)]
+    starts = np.arange(0, len(energy) - frame_len, hop_len)
+    power = (energy[starts + frame_len] - energy[starts]) / frame_len
+    return np.sqrt(np.maximum(power, 0.0))
+
+
+N_FFT  = 512
+N_MELS = 128
+N_MFCC = 13
+
+
+@lru_cache(maxsize=4)
+def _mfcc_matrices(sr: int):
+    """Mel filterbank and truncated orthonormal DCT-II matrix, built once per sample rate."""
+    mel_fb  = librosa.filters.mel(sr=sr, n_fft=N_FFT, n_mels=N_MELS)
+    dct_mat = dct(np.eye(N_MELS), type=2, norm="ortho", axis=0)[:N_MFCC]
+    return mel_fb, dct_mat
+
+
+def _run_librosa(y: np.ndarray, sr: int) -> dict:
+    """Tremor energy, MFCCs and spectral features from librosa."""
+    # ── 6. librosa features ───────────────────────────────────────────────────
+    # MFCCs use n_fft=512, hop_length=256. Centroid and rolloff keep librosa's
+    # default framing (n_fft=2048, hop_length=512) and share one STFT: at
+    # 512/256 they read ~26% / ~20% lower on real recordings, which would not
+    # be comparable with the values stored for earlier sessions.
+    mag = np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=256))
+    mag_wide = np.abs(librosa.stft(y))
+
+    # MFCCs — 13 coefficients (standard for speech)
+    # (same as librosa.feature.mfcc: mel power -> dB with 80 dB floor -> DCT-II)
+    mel_fb, dct_mat = _mfcc_matrices(sr)
+    log_mel = 10.0 * np.log10(np.maximum(mel_fb @ (mag ** 2), 1e-10))
+    np.maximum(log_mel, log_mel.max() - 80.0, out=log_mel)
+    mfcc_means = dct_mat @ log_mel.mean(axis=1)      # DCT is linear: mean first
+
+    # Spectral
+    spec_centroid = float(np.mean(librosa.feature.spectral_centroid(S=mag_wide, sr=sr)))
+    spec_rolloff  = float(np.mean(librosa.feature.spectral_rolloff(S=mag_wide, sr=sr, roll_percent=0.85)))
+    zcr           = float(np.mean(librosa.feature.zero_crossing_rate(y)))
+
+    # ── 8. Vocal Tremor (0–12 Hz amplitude modulation) ───────────────────────
+    # Extract low-frequency amplitude envelope modulation
+    frame_len = int(sr * 0.025)
+    hop_len   = int(sr * 0.010)
+    rms       = _frame_rms(y, frame_len, hop_len)
+    rms_sr    = sr / hop_len
+
+    if len(rms) > 64:
+        n = len(rms)
+        rms -= rms.mean()
+        fft_rms = np.abs(rfft(rms))
+        # Parkinsonian tremor band (3–12 Hz) as a contiguous bin range
+        lo = math.ceil(3 * n / rms_sr)
+        hi = math.floor(12 * n / rms_sr) + 1
+        tremor_energy = float(fft_rms[lo:hi].sum() / (fft_rms.sum() + 1e-8))
+    else:
+        tremor_energy = 0.0
+
+    return {
         "tremor_energy":  tremor_energy,
         # MFCCs
         "mfcc_1":  float(mfcc_means[0]),
@@ -239,7 +505,6 @@ def extract_biomarkers(audio_path: str) -> dict:
         "spectral_centroid": spec_centroid,
         "spectral_rolloff":  spec_rolloff,
         "zcr":               zcr,
-        "duration":          float(duration),
     }
 
 
@@ -256,20 +521,47 @@ NORMAL_RANGES = {
     "tremor_energy": (0,   0.15,  "",   "Tremor Energy (3-12 Hz)"),
 }
 
+# Bounds as aligned arrays so flagging is one vectorised comparison
+_RANGE_KEYS = tuple(NORMAL_RANGES)
+_RANGE_LO   = np.array([NORMAL_RANGES[k][0] for k in _RANGE_KEYS], dtype=np.float64)
+_RANGE_HI   = np.array([NORMAL_RANGES[k][1] for k in _RANGE_KEYS], dtype=np.float64)
+
+
 def flag_abnormal(biomarkers: dict) -> list[dict]:
     """Return list of biomarker findings that fall outside normal range."""
+    vec = np.fromiter(
+        (np.nan if (v := biomarkers.get(k)) is None else v for k in _RANGE_KEYS),
+        dtype=np.float64, count=len(_RANGE_KEYS),
+    )
+    # NaN compares False on both sides, so missing values are never flagged
+    out_of_range = (vec < _RANGE_LO) | (vec > _RANGE_HI)
+
     flags = []
-    for key, (lo, hi, unit, label) in NORMAL_RANGES.items():
-        val = biomarkers.get(key)
-        if val is None:
-            continue
-        if not (lo <= val <= hi):
-            severity = "High" if abs(val - hi) / (hi - lo + 1e-8) > 0.5 else "Moderate"
-            flags.append({
-                "biomarker": label,
-                "value": round(val, 5),
-                "unit": unit,
-                "normal_range": f"{lo}–{hi} {unit}".strip(),
-                "severity": severity,
-            })
+    for i in np.flatnonzero(out_of_range):
+        lo, hi, unit, label = NORMAL_RANGES[_RANGE_KEYS[i]]
+        val = float(vec[i])
+        severity = "High" if abs(val - hi) / (hi - lo + 1e-8) > 0.5 else "Moderate"
+        flags.append({
+            "biomarker": label,
+            "value": round(val, 5),
+            "unit": unit,
+            "normal_range": f"{lo}–{hi} {unit}".strip(),
+            "severity": severity,
+        })
     return flags
+
+
+# ── Numba warm-up ─────────────────────────────────────────────────────────────
+def _warmup():
+    """
+    Compile (or load from the on-disk numba cache) every @njit kernel at
+    import, so the first upload doesn't pay the compile. cache=True needs a
+    writable __pycache__ next to this file, or NUMBA_CACHE_DIR.
+    """
+    voiced = np.array([100.0, 101.0, 99.0] * 10)
+    _ppe(voiced, 100.0)
+    _finalize(voiced, voiced, 20.0, 0.001, 0.01)
+    _quantile(voiced, 0.25)
+
+
+_warmup()
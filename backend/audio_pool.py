@@ -0,0 +1,113 @@
+# backend/audio_pool.py
+"""
+Worker-process pool for biomarker extraction.
+Praat + librosa are CPU-bound and hold the GIL unevenly, so concurrent
+uploads are dispatched to separate processes instead of blocking the
+FastAPI event loop one after another.
+"""
+import os
+import asyncio
+import shutil
+import logging
+import tempfile
+import multiprocessing
+from collections import OrderedDict
+from multiprocessing.pool import Pool
+from typing import Optional
+
+import audio_analyzer
+
+logger = logging.getLogger(__name__)
+
+# Each uvicorn worker (WEB_CONCURRENCY) owns its own pool, so the cores are
+# split between them rather than every worker claiming all of them
+WEB_CONCURRENCY     = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+MAX_WORKERS         = max(1, ((os.cpu_count() or 2) - 1) // WEB_CONCURRENCY)
+MAX_TASKS_PER_CHILD = 50     # recycle workers to cap Praat/librosa memory growth
+
+_pool: Optional[Pool] = None
+_tmpdir: Optional[str] = None   # shared by the workers, removed in shutdown()
+
+# Results keyed by SHA-256 of the uploaded audio: extraction is a pure
+# function of the bytes, so a re-upload of the same recording skips the
+# Praat/librosa pass entirely. Per process; cleared on restart, so a change
+# to audio_analyzer never serves stale features.
+BIO_CACHE_SIZE = 256
+_bio_cache: "OrderedDict[str, dict]" = OrderedDict()
+
+
+def _init_worker(tmpdir: str):
+    """Runs once per worker: pool tmpdir (numba kernels are warmed at import)."""
+    tempfile.tempdir = tmpdir
+
+
+def start():
+    """Create the pool. Called from the FastAPI startup hook."""
+    global _pool, _tmpdir
+    if _pool is None:
+        # One directory for the pool's lifetime rather than one per worker:
+        # workers are recycled every MAX_TASKS_PER_CHILD tasks and exit via
+        # os._exit (no atexit), so per-worker dirs would pile up in /tmp
+        _tmpdir = tempfile.mkdtemp(prefix=f"neurovoice_{os.getpid()}_")
+        _pool = multiprocessing.Pool(
+            processes=MAX_WORKERS,
+            initializer=_init_worker,
+            initargs=(_tmpdir,),
+            maxtasksperchild=MAX_TASKS_PER_CHILD,
+        )
+        logger.info("Audio worker pool started (%d workers)", MAX_WORKERS)
+
+
+def shutdown():
+    global _pool, _tmpdir
+    if _pool is not None:
+        _pool.close()
+        _pool.join()
+        _pool = None
+    if _tmpdir is not None:
+        shutil.rmtree(_tmpdir, ignore_errors=True)
+        _tmpdir = None
+
+
+async def extract(audio_path: str, digest: Optional[str] = None) -> dict:
+    """
+    Run audio_analyzer.extract_biomarkers() on a worker; errors propagate unchanged.
+    With `digest` (hex SHA-256 of the file), results are memoized per content.
+    """
+    if digest is not None and digest in _bio_cache:
+        _bio_cache.move_to_end(digest)
+        logger.info("Biomarker cache hit for %s", digest[:12])
+        return dict(_bio_cache[digest])
+
+    if _pool is None:
+        start()
+
+    loop   = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def _done(result):
+        loop.call_soon_threadsafe(_resolve, future, result, None)
+
+    def _failed(exc):
+        loop.call_soon_threadsafe(_resolve, future, None, exc)
+
+    _pool.apply_async(
+        audio_analyzer.extract_biomarkers, (audio_path,),
+        callback=_done, error_callback=_failed,
+    )
+    bio = await future
+
+    if digest is not None:
+        _bio_cache[digest] = dict(bio)
+        if len(_bio_cache) > BIO_CACHE_SIZE:
+            _bio_cache.popitem(last=False)
+    return bio
+
+
+def _resolve(future: asyncio.Future, result, exc):
+    if future.cancelled():
+        return
+    if exc is not None:
+        future.set_exception(exc)
+    else:
+        future.set_result(result)
@@ -4,23 +4,108 @@ SQLite database schema using SQLAlchemy ORM.
 Stores: patients, voice sessions, biomarker readings, clinical recommendations.
 """
 import os
-from datetime import datetime
+import time
+import logging
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+import orjson
 from sqlalchemy import (
-    create_engine, Column, Integer, Float, String,
-    DateTime, Text, Boolean, ForeignKey
+    create_engine, event, text, Column, Integer, Float, String,
+    DateTime, Text, Boolean, ForeignKey, Index, LargeBinary, JSON, SmallInteger,
 )
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH  = os.path.join(BASE_DIR, "neuvoice.db")
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+logger = logging.getLogger(__name__)
+
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False, "timeout": 30},
+    poolclass=QueuePool,
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    # JSON columns go through orjson (numpy scalars included)
+    json_serializer=lambda obj: orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode(),
+    json_deserializer=orjson.loads,
+)
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_conn, _):
+    """
+    WAL lets readers proceed during a write; NORMAL sync drops the per-commit
+    fsync. (page_size, if ever tuned, has to be set before switching to WAL.)
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=1073741824")   # 1 GB
+    cursor.execute("PRAGMA cache_size=-16000")      # ~16 MB page cache
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+@event.listens_for(engine, "close")
+def _optimize_on_close(dbapi_conn, _):
+    """
+    PRAGMA optimize as the pool closes a connection (recycle, overflow,
+    dispose); a no-op unless the planner stats have gone stale.
+    """
+    try:
+        dbapi_conn.execute("PRAGMA optimize")
+    except Exception:
+        pass
+
+
+# ── Slow-query log (set NEUROVOICE_SLOW_SQL=1 to enable) ─────────────────────
+SLOW_QUERY_MS = 100
+
+if os.getenv("NEUROVOICE_SLOW_SQL", "").lower() in ("1", "true", "yes"):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _query_start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _query_end(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        if elapsed_ms > SLOW_QUERY_MS:
+            logger.warning("Slow query (%.1f ms): %s", elapsed_ms, statement)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
 # ─────────────────────────────────────────────
+# Achievement IDs in bit order; append new ones, never reorder
+ACHIEVEMENT_IDS = ("first_scan", "streak_3", "streak_7")
+ACH_FIRST_SCAN, ACH_STREAK_3, ACH_STREAK_7 = (1 << i for i in range(len(ACHIEVEMENT_IDS)))
+
+
+@lru_cache(maxsize=None)
+def _achievement_ids(mask: int) -> tuple:
+    return tuple(name for i, name in enumerate(ACHIEVEMENT_IDS) if mask >> i & 1)
+
+
+def achievement_ids(mask: int) -> list:
+    return list(_achievement_ids(mask))
+
+
+def achievement_mask(ids) -> int:
+    """Inverse of achievement_ids(); unknown IDs are ignored."""
+    return sum(1 << ACHIEVEMENT_IDS.index(a) for a in set(ids) if a in ACHIEVEMENT_IDS)
+
+
 class Patient(Base):
     __tablename__ = "patients"
 
@@ -31,18 +116,98 @@ class Patient(Base):
     language    = Column(String(10), default="en")
     phone       = Column(String(20))
     email       = Column(String(120))
-    created_at  = Column(DateTime, default=datetime.utcnow)
+    created_at  = Column(DateTime, server_default=func.now())
 
     # ── Gamification ──────────────────────────
     xp                  = Column(Integer, default=0)
     streak_count        = Column(Integer, default=0)
     last_activity_date  = Column(DateTime)
-    achievements_json   = Column(Text, default="[]")  # List of achievement IDs
-
-    sessions        = relationship("VoiceSession", back_populates="patient")
-    motor_sessions  = relationship("MotorSession", back_populates="patient")
+    # Earned achievements as bits of ACHIEVEMENT_IDS (bit i = ACHIEVEMENT_IDS[i])
+    achievements_mask   = Column(Integer, nullable=False, default=0, server_default="0")
+
+    @property
+    def achievements(self) -> list:
+        """Earned achievement IDs, decoded from achievements_mask."""
+        return achievement_ids(self.achievements_mask or 0)
+
+    # Newest first, matching how every endpoint lists them
+    sessions        = relationship("VoiceSession", back_populates="patient",
+                                   order_by="desc(VoiceSession.recorded_at)")
+    motor_sessions  = relationship("MotorSession", back_populates="patient",
+                                   order_by="desc(MotorSession.recorded_at)")
     imaging_sessions = relationship("ImagingSession", back_populates="patient")
 
+    __table_args__ = (
+        # Leaderboard: ORDER BY xp DESC LIMIT 10 walks this backwards
+        Index("ix_patients_xp", "xp"),
+    )
+
+
+# ─────────────────────────────────────────────
+# Biomarkers are always written and read together, so VoiceSession stores
+# them as two packed arrays instead of 33 Float columns: the Praat measures
+# as float32 (jitter/shimmer need the precision) and the spectral features
+# as float16 (they only feed the risk model).
+PRAAT_ORDER = (
+    "fo_mean",                                     # avg fundamental freq Hz
+    "fo_max",                                      # max fundamental freq Hz
+    "fo_min",                                      # min fundamental freq Hz
+    "jitter_local",                                # MDVP:Jitter(%) — normal < 1.04 %
+    "jitter_abs",                                  # MDVP:Jitter(Abs) — normal < 83.2 µs
+    "jitter_rap",                                  # MDVP:RAP
+    "jitter_ppq5",                                 # MDVP:PPQ
+    "jitter_ddp",                                  # Jitter:DDP = 3×RAP
+    "shimmer_local",                               # MDVP:Shimmer — normal < 3.81 %
+    "shimmer_db",                                  # MDVP:Shimmer(dB) — normal < 0.35 dB
+    "shimmer_apq3",
+    "shimmer_apq5",
+    "shimmer_apq11",
+    "shimmer_dda",
+    "nhr",                                         # Noise-to-Harmonic Ratio
+    "hnr",                                         # Harmonics-to-Noise Ratio dB — normal > 20
+    "ppe",                                         # Pitch Period Entropy proxy
+)
+SPECTRAL_ORDER = (
+    "mfcc_1", "mfcc_2", "mfcc_3", "mfcc_4", "mfcc_5", "mfcc_6", "mfcc_7",
+    "mfcc_8", "mfcc_9", "mfcc_10", "mfcc_11", "mfcc_12", "mfcc_13",
+    "spectral_centroid",
+    "spectral_rolloff",
+    "zcr",
+)
+BIOMARKER_ORDER = PRAAT_ORDER + SPECTRAL_ORDER
+
+# (column, element dtype, names) for each packed blob
+_BLOB_LAYOUT = (
+    ("praat_blob",    np.float32, PRAAT_ORDER),
+    ("spectral_blob", np.float16, SPECTRAL_ORDER),
+)
+
+
+def pack_biomarkers(biomarkers: dict) -> dict:
+    """
+    Biomarker dict → {"praat_blob": bytes, "spectral_blob": bytes}, ready to be
+    passed as VoiceSession column values. Missing values are stored as NaN.
+    """
+    packed = {}
+    for column, dtype, names in _BLOB_LAYOUT:
+        vec = np.full(len(names), np.nan, dtype=dtype)
+        for i, name in enumerate(names):
+            val = biomarkers.get(name)
+            if val is not None:
+                vec[i] = val
+        packed[column] = vec.tobytes()
+    return packed
+
+
+def unpack_biomarkers(praat_blob: Optional[bytes], spectral_blob: Optional[bytes]) -> np.ndarray:
+    """Both blobs → float32 vector aligned with BIOMARKER_ORDER."""
+    vec = np.full(len(BIOMARKER_ORDER), np.nan, dtype=np.float32)
+    if praat_blob is not None:
+        vec[:len(PRAAT_ORDER)] = np.frombuffer(praat_blob, dtype=np.float32)
+    if spectral_blob is not None:
+        vec[len(PRAAT_ORDER):] = np.frombuffer(spectral_blob, dtype=np.float16)
+    return vec
+
 
 # ─────────────────────────────────────────────
 class VoiceSession(Base):
@@ -50,47 +215,16 @@ class VoiceSession(Base):
 
     id             = Column(Integer, primary_key=True, index=True)
     patient_id     = Column(Integer, ForeignKey("patients.id"), nullable=False)
-    recorded_at    = Column(DateTime, default=datetime.utcnow)
+    recorded_at    = Column(DateTime, server_default=func.now())
     language       = Column(String(10), default="en")
     duration_sec   = Column(Float)
     audio_path     = Column(String(260))           # path to saved audio file
 
-    # ── Praat / MDVP biomarkers ──────────────
-    fo_mean        = Column(Float)                 # avg fundamental freq Hz
-    fo_max         = Column(Float)                 # max fundamental freq Hz
-    fo_min         = Column(Float)                 # min fundamental freq Hz
-    jitter_local   = Column(Float)                 # MDVP:Jitter(%) — normal < 1.04 %
-    jitter_abs     = Column(Float)                 # MDVP:Jitter(Abs) — normal < 83.2 µs
-    jitter_rap     = Column(Float)                 # MDVP:RAP
-    jitter_ppq5    = Column(Float)                 # MDVP:PPQ
-    jitter_ddp     = Column(Float)                 # Jitter:DDP = 3×RAP
-    shimmer_local  = Column(Float)                 # MDVP:Shimmer — normal < 3.81 %
-    shimmer_db     = Column(Float)                 # MDVP:Shimmer(dB) — normal < 0.35 dB
-    shimmer_apq3   = Column(Float)
-    shimmer_apq5   = Column(Float)
-    shimmer_apq11  = Column(Float)
-    shimmer_dda    = Column(Float)
-    nhr            = Column(Float)                 # Noise-to-Harmonic Ratio
-    hnr            = Column(Float)                 # Harmonics-to-Noise Ratio dB — normal > 20
-
-    # ── librosa / spectral ───────────────────
-    mfcc_1  = Column(Float)
-    mfcc_2  = Column(Float)
-    mfcc_3  = Column(Float)
-    mfcc_4  = Column(Float)
-    mfcc_5  = Column(Float)
-    mfcc_6  = Column(Float)
-    mfcc_7  = Column(Float)
-    mfcc_8  = Column(Float)
-    mfcc_9  = Column(Float)
-    mfcc_10 = Column(Float)
-    mfcc_11 = Column(Float)
-    mfcc_12 = Column(Float)
-    mfcc_13 = Column(Float)
-    spectral_centroid = Column(Float)
-    spectral_rolloff  = Column(Float)
-    zcr               = Column(Float)
-    ppe               = Column(Float)              # Pitch Period Entropy proxy
+    # ── Biomarkers (packed, see PRAAT_ORDER / SPECTRAL_ORDER) ─
+    # Individual values are exposed as read-only attributes of the same
+    # name (session.fo_mean, session.mfcc_1, ...).
+    praat_blob        = Column(LargeBinary)        # float32 × len(PRAAT_ORDER)
+    spectral_blob     = Column(LargeBinary)        # float16 × len(SPECTRAL_ORDER)
 
     # ── ML output ───────────────────────────
     risk_score        = Column(Float)              # 0–100
@@ -101,10 +235,49 @@ class VoiceSession(Base):
 
     # ── Clinical ─────────────────────────────
     clinical_stage    = Column(String(30))         # e.g. "Hoehn & Yahr 1"
-    recommendations   = Column(Text)              # JSON string
+    recommendations   = Column(JSON)              # clinical advice dict
 
     patient = relationship("Patient", back_populates="sessions")
 
+    @property
+    def biomarker_vector(self) -> np.ndarray:
+        return unpack_biomarkers(self.praat_blob, self.spectral_blob)
+
+    @property
+    def biomarkers(self) -> dict:
+        return {
+            name: (None if np.isnan(v) else float(v))
+            for name, v in zip(BIOMARKER_ORDER, self.biomarker_vector)
+        }
+
+    __table_args__ = (
+        # Longitudinal history: filter by patient, order by date
+        Index("ix_voice_sessions_patient_recorded", "patient_id", "recorded_at"),
+        # Dashboard: latest sessions overall, and the High-risk subset only
+        # (partial index, so it holds just the High rows)
+        Index("ix_voice_sessions_recorded", "recorded_at"),
+        Index("ix_voice_sessions_high_recorded", "recorded_at",
+              sqlite_where=text("risk_label = 'High'")),
+    )
+
+
+def _biomarker_attribute(column: str, dtype, index: int) -> property:
+    offset = index * np.dtype(dtype).itemsize
+
+    def fget(self):
+        blob = getattr(self, column)
+        if blob is None:
+            return None
+        val = float(np.frombuffer(blob, dtype=dtype, count=1, offset=offset)[0])
+        return None if np.isnan(val) else val
+
+    return property(fget, doc=f"Packed biomarker from {column} (None if missing).")
+
+
+for _column, _dtype, _names in _BLOB_LAYOUT:
+    for _i, _name in enumerate(_names):
+        setattr(VoiceSession, _name, _biomarker_attribute(_column, _dtype, _i))
+
 
 # ─────────────────────────────────────────────
 class MotorSession(Base):
@@ -112,7 +285,7 @@ class MotorSession(Base):
 
     id             = Column(Integer, primary_key=True, index=True)
     patient_id     = Column(Integer, ForeignKey("patients.id"), nullable=False)
-    recorded_at    = Column(DateTime, default=datetime.utcnow)
+    recorded_at    = Column(DateTime, server_default=func.now())
     
     # Results
     tremor_score   = Column(Float)    # 0-100
@@ -121,9 +294,25 @@ class MotorSession(Base):
     stability_idx  = Column(Float)
     
     label          = Column(String(30))  # "Normal" / "Mild Tremor" etc
+    # Motor-domain risk (20 / 60 / 90) for the fusion report, fixed at insert
+    risk_val       = Column(SmallInteger)
 
     patient = relationship("Patient", back_populates="motor_sessions")
 
+    __table_args__ = (
+        Index("ix_motor_sessions_patient_recorded", "patient_id", "recorded_at"),
+    )
+
+
+def motor_risk_val(label: Optional[str], tremor_score: Optional[float]) -> int:
+    """Motor-domain risk used by the fusion score, derived from the stage label."""
+    label = label or "N/A"
+    if "Stage 2.5" in label or (tremor_score or 0.0) > 30:
+        return 90
+    if "Stage 1-2" in label:
+        return 60
+    return 20
+
 
 # ─────────────────────────────────────────────
 class ImagingSession(Base):
@@ -131,7 +320,7 @@ class ImagingSession(Base):
 
     id             = Column(Integer, primary_key=True, index=True)
     patient_id     = Column(Integer, ForeignKey("patients.id"), nullable=False)
-    recorded_at    = Column(DateTime, default=datetime.utcnow)
+    recorded_at    = Column(DateTime, server_default=func.now())
     
     # Imaging Biomarkers
     imaging_type   = Column(String(20))  # MRI / DaT Scan
@@ -142,6 +331,10 @@ class ImagingSession(Base):
 
     patient = relationship("Patient", back_populates="imaging_sessions")
 
+    __table_args__ = (
+        Index("ix_imaging_sessions_patient_recorded", "patient_id", "recorded_at"),
+    )
+
 
 # ─────────────────────────────────────────────
 class BlogPost(Base):
@@ -154,9 +347,16 @@ class BlogPost(Base):
     thumbnail   = Column(String(300))
     post_type   = Column(String(20), default="video")
     likes       = Column(Integer, default=0)
-    created_at  = Column(DateTime, default=datetime.utcnow)
+    created_at  = Column(DateTime, server_default=func.now())
 
-    comments    = relationship("BlogComment", back_populates="post", cascade="all, delete-orphan")
+    # Oldest first (insertion order), so callers never re-sort
+    comments    = relationship("BlogComment", back_populates="post", cascade="all, delete-orphan",
+                               order_by="BlogComment.id")
+
+    __table_args__ = (
+        # Blog feed: ORDER BY created_at DESC walks this backwards, no sort step
+        Index("ix_blog_posts_created", "created_at"),
+    )
 
 
 class BlogComment(Base):
@@ -166,13 +366,111 @@ class BlogComment(Base):
     post_id     = Column(Integer, ForeignKey("blog_posts.id"), nullable=False)
     author_name = Column(String(100))
     content     = Column(Text, nullable=False)
-    created_at  = Column(DateTime, default=datetime.utcnow)
+    created_at  = Column(DateTime, server_default=func.now())
 
     post        = relationship("BlogPost", back_populates="comments")
 
 
+# ─────────────────────────────────────────────
+class OverviewStats(Base):
+    """Single-row cache of the dashboard counters, kept current on write."""
+    __tablename__ = "overview_stats"
+
+    id              = Column(Integer, primary_key=True)   # always 1
+    total_patients  = Column(Integer, nullable=False, default=0)
+    total_sessions  = Column(Integer, nullable=False, default=0)
+    high_risk_count = Column(Integer, nullable=False, default=0)
+    updated_at      = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+def refresh_overview_stats(db) -> OverviewStats:
+    """Recount from the source tables (startup, bulk writes, deletes)."""
+    values = {
+        "total_patients":  db.query(func.count(Patient.id)).scalar(),
+        "total_sessions":  db.query(func.count(VoiceSession.id)).scalar(),
+        "high_risk_count": db.query(func.count(VoiceSession.id))
+                             .filter(VoiceSession.risk_label == "High").scalar(),
+    }
+    stats = db.get(OverviewStats, 1)
+    if stats is None:
+        stats = OverviewStats(id=1, **values)
+        db.add(stats)
+    else:
+        for key, val in values.items():
+            setattr(stats, key, val)
+    db.commit()
+    return stats
+
+
+def bump_overview_stats(db, patients: int = 0, sessions: int = 0, high_risk: int = 0):
+    """
+    Increment the cached counters inside the caller's transaction (committed
+    with the row that caused it).
+    """
+    stmt = sqlite_insert(OverviewStats).values(
+        id=1, total_patients=patients, total_sessions=sessions, high_risk_count=high_risk,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[OverviewStats.id],
+        set_={
+            "total_patients":  OverviewStats.total_patients + patients,
+            "total_sessions":  OverviewStats.total_sessions + sessions,
+            "high_risk_count": OverviewStats.high_risk_count + high_risk,
+            "updated_at":      func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    # Older databases (including a checked-in neuvoice.db) get their missing
+    # columns / backfills first; a no-op once the schema is current.
+    from migrations import upgrade_schema
+    upgrade_schema(DB_PATH)
+
+    # With several uvicorn workers each one runs this at boot; BEGIN IMMEDIATE
+    # takes SQLite's write lock up front so the checkfirst/CREATE pairs below
+    # run one worker at a time instead of racing on a fresh database.
+    with engine.begin() as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        Base.metadata.create_all(bind=conn)
+        # create_all skips tables that already exist, so indexes added to an
+        # existing schema are created here.
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+    # Analyze every table once per boot (0x10002 = no row limit) so the
+    # planner has sqlite_stat1 data for the indexes above.
+    try:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA optimize=0x10002")
+    except Exception as e:
+        logger.warning("PRAGMA optimize on startup failed: %s", e)
+
+
+BULK_INSERT_BATCH = 500
+
+
+def bulk_insert_voice_sessions(db, rows: list[dict]) -> int:
+    """
+    Core-level INSERT for backfill / re-scoring jobs, bypassing the ORM unit
+    of work. Each row is a plain dict of VoiceSession columns (all rows with
+    the same keys); biomarker names from BIOMARKER_ORDER are packed into
+    praat_blob / spectral_blob. The single-upload path keeps using the ORM.
+    """
+    table = VoiceSession.__table__
+    for start in range(0, len(rows), BULK_INSERT_BATCH):
+        batch = []
+        for row in rows[start:start + BULK_INSERT_BATCH]:
+            values = {k: v for k, v in row.items() if k in table.c}
+            if "praat_blob" not in values:
+                values.update(pack_biomarkers(row))
+            batch.append(values)
+        db.execute(table.insert(), batch)
+    db.commit()
+    refresh_overview_stats(db)
+    return len(rows)
 
 
 def get_db():
@@ -13,6 +13,14 @@ import io
 
 logger = logging.getLogger(__name__)
 
+# 'High Uptake' hues (Yellow to Red in standard heatmaps):
+# red H 0–10, yellow H 20–30 (OpenCV 8-bit hue is 0–179)
+_HIGH_UPTAKE_HUE_LUT = np.zeros(256, dtype=np.uint8)
+_HIGH_UPTAKE_HUE_LUT[0:11] = 255
+_HIGH_UPTAKE_HUE_LUT[20:31] = 255
+_HIGH_UPTAKE_HUE_LUT.flags.writeable = False   # shared across requests
+_MIN_SAT_VAL = 100                 # both S and V must be >= this
+
 def analyze_dat_scan(image_bytes: bytes) -> dict:
     """
     Simulates a clinical DaT scan analysis.
@@ -33,21 +41,20 @@ def analyze_dat_scan(image_bytes: bytes) -> dict:
         
         # Define 'High Uptake' range (Yellow to Red in standard heatmaps)
         # Standard heatmaps: Red = max, Yellow = high, Green = mid
-        lower_red = np.array([0, 100, 100])
-        upper_red = np.array([10, 255, 255])
-        mask1 = cv2.inRange(hsv, lower_red, upper_red)
-        
-        lower_yellow = np.array([20, 100, 100])
-        upper_yellow = np.array([30, 255, 255])
-        mask2 = cv2.inRange(hsv, lower_yellow, upper_yellow)
-        
-        mask = cv2.bitwise_or(mask1, mask2)
+        # Red and yellow share S/V bounds, so both hue bands come from one LUT
+        h, s, v = cv2.split(hsv)
+        hue_mask = cv2.LUT(h, _HIGH_UPTAKE_HUE_LUT)
+        sv_mask = cv2.inRange(cv2.min(s, v), _MIN_SAT_VAL, 255)
+        mask = cv2.bitwise_and(hue_mask, sv_mask)
         
         # 2. Find Contours (The two striatal 'commas')
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
-        # Filter for the two largest regions (Left and Right Striatum)
-        contours = sorted(contours, key=cv2.contourArea, reverse=True)[:2]
+        # Filter for the two largest regions (Left and Right Striatum);
+        # each area is computed once and reused below
+        areas = [cv2.contourArea(c) for c in contours]
+        top = sorted(range(len(contours)), key=areas.__getitem__, reverse=True)[:2]
+        contours = [contours[i] for i in top]
         
         if len(contours) < 2:
             return {
@@ -58,8 +65,8 @@ def analyze_dat_scan(image_bytes: bytes) -> dict:
                 "status": "High Risk"
             }
 
-        area1 = cv2.contourArea(contours[0])
-        area2 = cv2.contourArea(contours[1])
+        area1 = areas[top[0]]
+        area2 = areas[top[1]]
         
         # Calculate Asymmetry
         total_area = area1 + area2
@@ -71,13 +78,12 @@ def analyze_dat_scan(image_bytes: bytes) -> dict:
         
         # 3. Shape Analysis (Roundness)
         # Healthy Striatum is a comma (elongated). PD Striatum is a dot (round).
-        def get_roundness(c):
+        def get_roundness(c, area):
             perimeter = cv2.arcLength(c, True)
-            area = cv2.contourArea(c)
             if perimeter == 0: return 0
             return (4 * np.pi * area) / (perimeter * perimeter)
 
-        roundness = (get_roundness(contours[0]) + get_roundness(contours[1])) / 2
+        roundness = (get_roundness(contours[0], area1) + get_roundness(contours[1], area2)) / 2
         
         # Clinical Heuristic
         # SBR < 0.8 OR Asymmetry > 0.15 OR Roundness > 0.8 (Dot shape)
@@ -16,26 +16,43 @@ NeuroVoice AI — FastAPI Backend
 Real biomarker analysis, persistent patient storage, clinical recommendations.
 """
 import os
-import json
+import re
+import bisect
 import uuid
+import hashlib
+import time
+import shutil
+import string
+import struct
 import logging
 import tempfile
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
+import aiofiles
+import numpy as np
+import orjson
 from fastapi import (
     FastAPI, UploadFile, File, Form, HTTPException,
-    Depends, WebSocket, WebSocketDisconnect
+    Depends, WebSocket, WebSocketDisconnect, BackgroundTasks
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import func, and_, case, insert, select, text, update
+from sqlalchemy.orm import Session, load_only, selectinload
 
-from database import init_db, get_db, Patient, VoiceSession, MotorSession, BlogPost, BlogComment, ImagingSession
-from audio_analyzer import extract_biomarkers, flag_abnormal
-from ml_model import predict
+from database import (
+    init_db, get_db, pack_biomarkers, refresh_overview_stats, bump_overview_stats,
+    motor_risk_val, ACH_FIRST_SCAN, ACH_STREAK_3, ACH_STREAK_7, OverviewStats, Patient, VoiceSession, MotorSession, BlogPost, BlogComment, ImagingSession,
+)
+from audio_analyzer import flag_abnormal
+import audio_pool
+from ml_model import predict, warmup as warmup_model
 from clinical_advisor import get_recommendations
 import imaging_analyzer
 
@@ -48,6 +65,7 @@ app = FastAPI(
     title="NeuroVoice AI API",
     description="Real-time neurological screening via vocal biomarker analysis.",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -61,32 +79,63 @@ app.add_middleware(
 # ── Audio upload directory ─────────────────────────────────────────────────────
 AUDIO_DIR = os.path.join(os.path.dirname(__file__), "audio_store")
 os.makedirs(AUDIO_DIR, exist_ok=True)
+UPLOAD_CHUNK_SIZE = 1 << 20    # 1 MB
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "parkinson_model.joblib")
+
+def _drop_page_cache(path: str):
+    """
+    The upload is read once by the analyzer and then only archived, so let the
+    kernel evict its pages ahead of the DB and model files. Linux only.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
 
 # ── On startup: init DB + check model ─────────────────────────────────────────
 @app.on_event("startup")
 def startup():
     init_db()
+    audio_pool.start()
     # Seed blog with educational content
     db = next(get_db())
     try:
         seed_blog(db)
+        refresh_overview_stats(db)
     finally:
         db.close()
 
-    model_path = os.path.join(os.path.dirname(__file__), "parkinson_model.joblib")
-    if not os.path.exists(model_path):
+    # Checked once; /health reports this instead of stat-ing on every heartbeat
+    app.state.model_ready = os.path.exists(MODEL_PATH)
+    if not app.state.model_ready:
         logger.warning("⚠️  ML model not found! Run: python backend/train_model.py")
     else:
         logger.info("✅ ML model found")
+        try:
+            warmup_model()
+        except Exception as e:
+            logger.warning("Model warm-up failed: %s", e)
     logger.info("✅ Database initialized")
 
 
+@app.on_event("shutdown")
+def shutdown():
+    audio_pool.shutdown()
+    _smtp_pool.close()
+
+
 # ── Health check ───────────────────────────────────────────────────────────────
 @app.get("/health", tags=["System"])
 def health_check():
     """Quick heartbeat endpoint — used by frontend to verify backend is online."""
-    model_path = os.path.join(os.path.dirname(__file__), "parkinson_model.joblib")
-    model_ready = os.path.exists(model_path)
+    model_ready = app.state.model_ready
     return {
         "status": "ok",
         "model_ready": model_ready,
@@ -160,77 +209,111 @@ class PatientOut(BaseModel):
     achievements: list[str]
     imaging_sessions: list[dict] = []
 
-    class Config:
-        from_attributes = True
+    @classmethod
+    def from_patient(cls, p: Patient, session_count: int) -> "PatientOut":
+        # Values come straight from a just-committed row, so validation is skipped
+        return cls.model_construct(
+            **{k: getattr(p, k) for k in _PATIENT_FIELDS},
+            session_count=session_count,
+            achievements=p.achievements or [],
+        )
+
+    def to_response(self) -> Response:
+        """
+        Serialized by the model's compiled pydantic-core serializer. Routes
+        list PatientOut under `responses=` (docs only) rather than
+        response_model, which would re-validate the returned object.
+        """
+        return Response(content=self.model_dump_json(), media_type="application/json")
+
+
+class LeaderboardEntry(BaseModel):
+    id:           int
+    name:         str
+    xp:           int
+    streak:       int
+    achievements: int
 
 
-@app.post("/patients", response_model=PatientOut, tags=["Patients"])
+@app.post("/patients", responses={200: {"model": PatientOut}}, tags=["Patients"])
 def create_patient(data: PatientCreate, db: Session = Depends(get_db)):
     p = Patient(**data.model_dump())
     db.add(p)
+    bump_overview_stats(db, patients=1)
     db.commit()
+    _invalidate_overview()
     db.refresh(p)
-    return {
-        **p.__dict__,
-        "session_count": 0,
-        "achievements": json.loads(p.achievements_json or "[]")
-    }
+    return PatientOut.from_patient(p, session_count=0).to_response()
 
 
 @app.get("/patients", tags=["Patients"])
 def list_patients(db: Session = Depends(get_db)):
-    patients = db.query(Patient).order_by(Patient.created_at.desc()).all()
-    result = []
-    for p in patients:
-        count = db.query(VoiceSession).filter(VoiceSession.patient_id == p.id).count()
-        latest = (
-            db.query(VoiceSession)
-            .filter(VoiceSession.patient_id == p.id)
-            .order_by(VoiceSession.recorded_at.desc())
-            .first()
+    # Session count + latest session per patient in one query
+    # (window functions over the (patient_id, recorded_at) index)
+    ranked = (
+        db.query(
+            VoiceSession.patient_id,
+            VoiceSession.risk_label,
+            VoiceSession.risk_score,
+            VoiceSession.recorded_at,
+            func.count().over(partition_by=VoiceSession.patient_id).label("session_count"),
+            func.row_number().over(
+                partition_by=VoiceSession.patient_id,
+                order_by=(VoiceSession.recorded_at.desc(), VoiceSession.id.desc()),
+            ).label("rn"),
         )
+        .subquery()
+    )
+    rows = (
+        db.query(Patient, ranked.c.session_count, ranked.c.risk_label,
+                 ranked.c.risk_score, ranked.c.recorded_at)
+        .outerjoin(ranked, and_(ranked.c.patient_id == Patient.id, ranked.c.rn == 1))
+        .order_by(Patient.created_at.desc())
+        .all()
+    )
+    result = []
+    for p, count, last_risk, last_score, last_scan in rows:
         result.append({
             "id":            p.id,
             "name":          p.name,
             "age":           p.age,
             "gender":        p.gender,
             "language":      p.language,
-            "session_count": count,
+            "session_count": count or 0,
             "xp":            p.xp or 0,
             "streak_count":  p.streak_count or 0,
-            "achievements":  json.loads(p.achievements_json or "[]"),
-            "last_risk":     latest.risk_label if latest else None,
-            "last_score":    latest.risk_score if latest else None,
-            "last_scan":     latest.recorded_at.isoformat() if latest else None,
+            "achievements":  p.achievements or [],
+            "last_risk":     last_risk,
+            "last_score":    last_score,
+            "last_scan":     last_scan.isoformat() if last_scan else None,
             "email":         p.email,
             "created_at":    p.created_at.isoformat(),
         })
-    return result
+    return ORJSONResponse(result)
 
 
 @app.delete("/patients", tags=["Patients"])
-def delete_all_patients(db: Session = Depends(get_db)):
+def delete_all_patients(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Wipe the entire clinical dataset (Patients + Sessions + Audio)."""
     try:
         # 1. Clear sessions first
         db.query(VoiceSession).delete()
         db.query(MotorSession).delete()
+        db.query(ImagingSession).delete()
         # 2. Clear patients
         db.query(Patient).delete()
         db.commit()
+        refresh_overview_stats(db)
+        _invalidate_overview()
 
-        # 3. Optional: Clear physical audio files
-        import shutil
+        # 3. Optional: Clear physical audio files. The directory is swapped
+        # for an empty one (a single rename) and the old tree is removed with
+        # one rmtree after the response, instead of a stat + unlink per file.
         if os.path.exists(AUDIO_DIR):
-            for filename in os.listdir(AUDIO_DIR):
-                file_path = os.path.join(AUDIO_DIR, filename)
-                try:
-                    if os.path.isfile(file_path) or os.path.islink(file_path):
-                        os.unlink(file_path)
-                    elif os.path.isdir(file_path):
-                        shutil.rmtree(file_path)
-                except Exception as e:
-                    logger.error(f"Failed to delete {file_path}. Reason: {e}")
+            trash_dir = f"{AUDIO_DIR}.trash-{uuid.uuid4().hex[:8]}"
+            os.replace(AUDIO_DIR, trash_dir)
+            os.makedirs(AUDIO_DIR, exist_ok=True)
+            background_tasks.add_task(_remove_tree, trash_dir)
 
         return {"status": "success", "message": "All clinical data and audio records have been wiped."}
     except Exception as e:
@@ -239,8 +322,12 @@ def delete_all_patients(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.patch("/patients/{patient_id}", response_model=PatientOut, tags=["Patients"])
-def update_patient(patient_id: int, data: PatientUpdate, db: Session = Depends(get_db)):
+def _remove_tree(path: str):
+    shutil.rmtree(path, onerror=lambda _fn, p, exc: logger.error("Failed to delete %s. Reason: %s", p, exc[1]))
+
+
+@app.patch("/patients/{patient_id}", responses={200: {"model": PatientOut}}, tags=["Patients"])
+def update_patient(patient_id: int, data: PatientUpdate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     p = db.query(Patient).filter(Patient.id == patient_id).first()
     if not p:
         raise HTTPException(status_code=404, detail="Patient not found")
@@ -259,35 +346,30 @@ def update_patient(patient_id: int, data: PatientUpdate, db: Session = Depends(g
         voice = db.query(VoiceSession).filter(VoiceSession.patient_id == p.id).first()
         motor = db.query(MotorSession).filter(MotorSession.patient_id == p.id).first()
         if voice and motor:
-            send_complete_report(p, motor, db)
+            send_complete_report(p, db, background_tasks)
 
-    return {
-        **p.__dict__,
-        "session_count": db.query(VoiceSession).filter(VoiceSession.patient_id == p.id).count(),
-        "achievements": json.loads(p.achievements_json or "[]")
-    }
+    session_count = db.query(VoiceSession).filter(VoiceSession.patient_id == p.id).count()
+    return PatientOut.from_patient(p, session_count).to_response()
 
 
 @app.get("/patients/{patient_id}", tags=["Patients"])
 def get_patient(patient_id: int, db: Session = Depends(get_db)):
-    p = db.query(Patient).filter(Patient.id == patient_id).first()
+    # Patient + all three histories in four fixed statements, no lazy loads
+    p = (
+        db.query(Patient)
+        .options(
+            selectinload(Patient.sessions).load_only(*_SESSION_SUMMARY_FIELDS),
+            selectinload(Patient.motor_sessions),
+            selectinload(Patient.imaging_sessions),
+        )
+        .filter(Patient.id == patient_id)
+        .first()
+    )
     if not p:
         raise HTTPException(status_code=404, detail="Patient not found")
-    sessions = (
-        db.query(VoiceSession)
-        .filter(VoiceSession.patient_id == patient_id)
-        .order_by(VoiceSession.recorded_at.desc())
-        .all()
-    )
-    motor_sessions = (
-        db.query(MotorSession)
-        .filter(MotorSession.patient_id == patient_id)
-        .order_by(MotorSession.recorded_at.desc())
-        .all()
-    )
-    return {
-        "patient":  {**p.__dict__},
-        "sessions": [_session_to_dict(s) for s in sessions],
+    return ORJSONResponse({
+        "patient":  _patient_to_dict(p),
+        "sessions": [_session_to_dict(s) for s in p.sessions],
         "motor_sessions": [
             {
                 "id": m.id,
@@ -298,7 +380,7 @@ def get_patient(patient_id: int, db: Session = Depends(get_db)):
                 "stability_idx": m.stability_idx,
                 "label": m.label
             }
-            for m in motor_sessions
+            for m in p.motor_sessions
         ],
         "imaging_sessions": [
             {
@@ -310,7 +392,7 @@ def get_patient(patient_id: int, db: Session = Depends(get_db)):
             }
             for i in p.imaging_sessions
         ]
-    }
+    })
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -320,6 +402,7 @@ def get_patient(patient_id: int, db: Session = Depends(get_db)):
 @app.post("/patients/{patient_id}/analyze", tags=["Analysis"])
 async def analyze_voice(
     patient_id: int,
+    background_tasks: BackgroundTasks,
     audio:    UploadFile = File(...),
     language: str        = Form("en"),
     db:       Session    = Depends(get_db),
@@ -338,24 +421,32 @@ async def analyze_voice(
     ext       = audio.filename.split(".")[-1] if "." in audio.filename else "bin"
     filename  = f"p{patient_id}_{uuid.uuid4().hex[:8]}.{ext}"
     save_path = os.path.join(AUDIO_DIR, filename)
-    raw_bytes = await audio.read()
-    with open(save_path, "wb") as f:
-        f.write(raw_bytes)
-    logger.info("Audio saved: %s (%d bytes)", save_path, len(raw_bytes))
+    # Copied in chunks so large uploads are never held in memory whole;
+    # aiofiles keeps the disk writes off the event loop
+    bytes_written = 0
+    hasher = hashlib.sha256()   # content key for audio_pool's result cache
+    async with aiofiles.open(save_path, "wb") as f:
+        while chunk := await audio.read(UPLOAD_CHUNK_SIZE):
+            await f.write(chunk)
+            hasher.update(chunk)
+            bytes_written += len(chunk)
+    logger.info("Audio saved: %s (%d bytes)", save_path, bytes_written)
 
     # ── Extract biomarkers ────────────────────────────────────────────────────
     try:
-        bio = extract_biomarkers(save_path)
+        bio = await audio_pool.extract(save_path, digest=hasher.hexdigest())
         logger.info(f"Biomarkers extracted: fo_mean={bio.get('fo_mean')}, jitter={bio.get('jitter_local')}, hnr={bio.get('hnr')}")
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error("Biomarker extraction error: %s", e)
         raise HTTPException(status_code=500, detail=f"Analysis failed: {e}")
+    finally:
+        _drop_page_cache(save_path)
 
     # ── ML Prediction ─────────────────────────────────────────────────────────
     try:
-        ml = predict(bio)
+        ml = await run_in_threadpool(predict, bio)   # keeps the loop free during the XGBoost call
         logger.info(f"Model Prediction: Score={ml['risk_score']}%, Label={ml['risk_label']}, Prob={ml['parkinson_prob']}")
     except FileNotFoundError:
         raise HTTPException(
@@ -372,72 +463,47 @@ async def analyze_voice(
     )
 
     # ── Persist to DB ─────────────────────────────────────────────────────────
-    session = VoiceSession(
-        patient_id     = patient_id,
-        language       = language,
-        duration_sec   = bio.get("duration"),
-        audio_path     = save_path,
-        fo_mean        = bio["fo_mean"],
-        fo_max         = bio["fo_max"],
-        fo_min         = bio["fo_min"],
-        jitter_local   = bio["jitter_local"],
-        jitter_abs     = bio["jitter_abs"],
-        jitter_rap     = bio["jitter_rap"],
-        jitter_ppq5    = bio["jitter_ppq5"],
-        jitter_ddp     = bio["jitter_ddp"],
-        shimmer_local  = bio["shimmer_local"],
-        shimmer_db     = bio["shimmer_db"],
-        shimmer_apq3   = bio["shimmer_apq3"],
-        shimmer_apq5   = bio["shimmer_apq5"],
-        shimmer_apq11  = bio["shimmer_apq11"],
-        shimmer_dda    = bio["shimmer_dda"],
-        nhr            = bio["nhr"],
-        hnr            = bio["hnr"],
-        mfcc_1         = bio["mfcc_1"],
-        mfcc_2         = bio["mfcc_2"],
-        mfcc_3         = bio["mfcc_3"],
-        mfcc_4         = bio["mfcc_4"],
-        mfcc_5         = bio["mfcc_5"],
-        mfcc_6         = bio["mfcc_6"],
-        mfcc_7         = bio["mfcc_7"],
-        mfcc_8         = bio["mfcc_8"],
-        mfcc_9         = bio["mfcc_9"],
-        mfcc_10        = bio["mfcc_10"],
-        mfcc_11        = bio["mfcc_11"],
-        mfcc_12        = bio["mfcc_12"],
-        mfcc_13        = bio["mfcc_13"],
-        spectral_centroid = bio["spectral_centroid"],
-        spectral_rolloff  = bio["spectral_rolloff"],
-        zcr            = bio["zcr"],
-        ppe            = bio["ppe"],
-        risk_score     = ml["risk_score"],
-        risk_label     = ml["risk_label"],
-        parkinson_prob = ml["parkinson_prob"],
-        confidence     = ml["confidence"],
-        model_version  = ml["model_version"],
-        clinical_stage = clinical["clinical_stage"],
-        recommendations = json.dumps(clinical),
-    )
-    db.add(session)
+    # Core INSERT ... RETURNING: no ORM instance, flush or refresh round-trip
+    session_id, recorded_at = db.execute(
+        insert(VoiceSession)
+        .values(
+            patient_id     = patient_id,
+            # explicit so RETURNING sees it on older tables whose default is a trigger
+            recorded_at    = func.now(),
+            language       = language,
+            duration_sec   = bio.get("duration"),
+            audio_path     = save_path,
+            **pack_biomarkers(bio),
+            risk_score     = ml["risk_score"],
+            risk_label     = ml["risk_label"],
+            parkinson_prob = ml["parkinson_prob"],
+            confidence     = ml["confidence"],
+            model_version  = ml["model_version"],
+            clinical_stage = clinical["clinical_stage"],
+            recommendations = clinical,
+        )
+        .returning(VoiceSession.id, VoiceSession.recorded_at)
+    ).one()
+    bump_overview_stats(db, sessions=1, high_risk=int(ml["risk_label"] == "High"))
     
     # ── Update Gamification ──────────────────────────────────────────────────
     update_patient_gamification(patient, db)
 
     db.commit()
-    db.refresh(session)
+    _invalidate_overview()
 
     # ── Automatically send combined report if all results exist ──────────────
-    send_complete_report(patient, db)
+    send_complete_report(patient, db, background_tasks)
 
     logger.info(
         "Session %d | Patient %d | Risk: %s (%.1f%%) | PD-Prob: %.3f",
-        session.id, patient_id, ml["risk_label"], ml["risk_score"], ml["parkinson_prob"]
+        session_id, patient_id, ml["risk_label"], ml["risk_score"], ml["parkinson_prob"]
     )
 
     return {
-        "session_id":    session.id,
+        "session_id":    session_id,
         "patient_id":    patient_id,
-        "recorded_at":   session.recorded_at.isoformat(),
+        "recorded_at":   recorded_at.isoformat(),
         "duration_sec":  bio.get("duration"),
         "biomarkers":    bio,
         "abnormal_flags": flags,
@@ -447,14 +513,20 @@ async def analyze_voice(
             "xp_earned": 25,
             "new_xp":    patient.xp,
             "streak":    patient.streak_count,
-            "achievements": json.loads(patient.achievements_json or "[]")
+            "achievements": patient.achievements or []
         }
     }
 
 
+def _analyze_uploaded_scan(f) -> dict:
+    f.seek(0)
+    return imaging_analyzer.analyze_dat_scan(f.read())
+
+
 @app.post("/patients/{patient_id}/imaging/analyze", tags=["Analysis"])
 async def analyze_imaging_image(
     patient_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -463,9 +535,10 @@ async def analyze_imaging_image(
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
-    # Read image
-    content = await file.read()
-    results = imaging_analyzer.analyze_dat_scan(content)
+    # Read + decode + analyse in one threadpool hop: the spooled upload is
+    # read synchronously there (decoding needs the whole buffer) instead of a
+    # separate await file.read() hop first
+    results = await run_in_threadpool(_analyze_uploaded_scan, file.file)
     
     if "error" in results:
         raise HTTPException(status_code=400, detail=results["error"])
@@ -480,12 +553,12 @@ async def analyze_imaging_image(
     db.add(session)
     
     # Update Gamification
-    patient.xp += 200
+    _award_xp(db, patient_id, 200)
     
     db.commit()
     
     # ── Automatically send combined report if all results exist ──────────────
-    send_complete_report(patient, db)
+    send_complete_report(patient, db, background_tasks)
 
     return results
 
@@ -498,12 +571,13 @@ async def analyze_imaging_image(
 def get_sessions(patient_id: int, limit: int = 30, db: Session = Depends(get_db)):
     sessions = (
         db.query(VoiceSession)
+        .options(_SESSION_SUMMARY_COLUMNS)
         .filter(VoiceSession.patient_id == patient_id)
         .order_by(VoiceSession.recorded_at.desc())
         .limit(limit)
         .all()
     )
-    return [_session_to_dict(s) for s in sessions]
+    return ORJSONResponse([_session_to_dict(s) for s in sessions])
 
 
 @app.get("/patients/{patient_id}/trend", tags=["Sessions"])
@@ -511,6 +585,8 @@ def get_risk_trend(patient_id: int, days: int = 30, db: Session = Depends(get_db
     """Returns time-series data for chart rendering."""
     sessions = (
         db.query(VoiceSession)
+        .options(load_only(VoiceSession.recorded_at, VoiceSession.risk_score,
+                           VoiceSession.risk_label, VoiceSession.praat_blob))
         .filter(VoiceSession.patient_id == patient_id)
         .order_by(VoiceSession.recorded_at.asc())
         .limit(days)
@@ -533,38 +609,53 @@ def get_risk_trend(patient_id: int, days: int = 30, db: Session = Depends(get_db
 #   ALL PATIENTS OVERVIEW
 # ══════════════════════════════════════════════════════════════════════════════
 
+# Serialized /overview body, reused for OVERVIEW_TTL_SEC or until a write
+# that changes it calls _invalidate_overview() (per worker process)
+OVERVIEW_TTL_SEC = 30
+_overview_cache = {"body": None, "expires": 0.0}
+
+
+def _invalidate_overview():
+    _overview_cache["body"] = None
+
+
 @app.get("/overview", tags=["Dashboard"])
 def get_overview(db: Session = Depends(get_db)):
-    total_patients = db.query(Patient).count()
-    total_sessions = db.query(VoiceSession).count()
-    high_risk = (
-        db.query(VoiceSession)
-        .filter(VoiceSession.risk_label == "High")
-        .count()
-    )
+    if _overview_cache["body"] is not None and time.monotonic() < _overview_cache["expires"]:
+        return Response(content=_overview_cache["body"], media_type="application/json")
+
+    # Counters come from the overview_stats cache row (maintained on write)
+    stats = db.get(OverviewStats, 1) or refresh_overview_stats(db)
     recent = (
         db.query(VoiceSession)
+        .options(_SESSION_SUMMARY_COLUMNS)
         .order_by(VoiceSession.recorded_at.desc())
         .limit(5)
         .all()
     )
-    return {
-        "total_patients": total_patients,
-        "total_sessions": total_sessions,
-        "high_risk_count": high_risk,
+    body = orjson.dumps({
+        "total_patients": stats.total_patients,
+        "total_sessions": stats.total_sessions,
+        "high_risk_count": stats.high_risk_count,
         "recent_sessions": [_session_to_dict(s) for s in recent],
-    }
+    })
+    _overview_cache.update(body=body, expires=time.monotonic() + OVERVIEW_TTL_SEC)
+    return Response(content=body, media_type="application/json")
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 #   WEBSOCKET — REAL-TIME WAVEFORM STREAMING (amplitude only)
 # ══════════════════════════════════════════════════════════════════════════════
 
+_AMPLITUDE_FRAME = struct.Struct("<f")
+
+
 @app.websocket("/ws/live/{patient_id}")
 async def websocket_live(websocket: WebSocket, patient_id: int):
     """
     Client streams raw 16-bit PCM chunks (little-endian).
-    Server replies with real-time RMS amplitude for waveform display.
+    Server replies with real-time RMS amplitude for waveform display, as one
+    4-byte little-endian float32 binary frame per chunk.
     NOT for analysis — just live visualization.
     """
     await websocket.accept()
@@ -573,18 +664,17 @@ async def websocket_live(websocket: WebSocket, patient_id: int):
         while True:
             data = await websocket.receive_bytes()
             if data:
-                samples = [
-                    int.from_bytes(data[i:i+2], "little", signed=True)
-                    for i in range(0, len(data) - 1, 2)
-                ]
-                if samples:
-                    rms = (sum(s * s for s in samples) / len(samples)) ** 0.5
+                # int16 LE view of the chunk (a trailing odd byte is ignored)
+                samples = np.frombuffer(data, dtype="<i2", count=len(data) // 2)
+                if samples.size:
+                    rms = float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
                     amplitude_norm = min(rms / 32768, 1.0)
-                    await websocket.send_json({"amplitude": round(amplitude_norm, 4)})
+                    await websocket.send_bytes(_AMPLITUDE_FRAME.pack(amplitude_norm))
     except WebSocketDisconnect:
         logger.info("WebSocket closed for patient %d", patient_id)
 
 import smtplib
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
@@ -601,6 +691,60 @@ class Settings(BaseSettings):
 
 conf = Settings()
 
+
+class SMTPPool:
+    """
+    One persistent, logged-in Gmail SMTP_SSL connection shared by every
+    background send, instead of a TCP + TLS + AUTH handshake per email.
+    Opened lazily on first send; a stale connection is detected with NOOP
+    and replaced transparently.
+    """
+    def __init__(self, host: str = 'smtp.gmail.com', port: int = 465, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._server: Optional[smtplib.SMTP_SSL] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP_SSL:
+        server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        server.login(conf.GMAIL_USER, conf.GMAIL_PASS)
+        return server
+
+    def _alive(self) -> bool:
+        try:
+            return self._server is not None and self._server.noop()[0] == 250
+        except OSError:   # SMTPException and socket errors
+            return False
+
+    def send(self, msg: MIMEMultipart):
+        with self._lock:
+            if not self._alive():
+                self._reset()
+                self._server = self._connect()
+            try:
+                self._server.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, OSError):
+                # Gmail dropped us between NOOP and DATA; reconnect and retry once
+                self._reset()
+                self._server = self._connect()
+                self._server.send_message(msg)
+
+    def _reset(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+    def close(self):
+        with self._lock:
+            self._reset()
+
+
+_smtp_pool = SMTPPool()
+
 # ── Doctor Data (Real-time Scraped simulation) ────────────────────────────────
 REAL_DOCTORS = [
     {
@@ -677,6 +821,16 @@ REAL_DOCTORS = [
     }
 ]
 
+_REAL_DOCTORS_JSON = orjson.dumps(REAL_DOCTORS)   # static list, encoded once
+
+# Pre-encoded per-city lists keyed by the city at the end of "hospital";
+# unknown locations fall back to the full list
+_doctors_by_city: dict = {}
+for _doc in REAL_DOCTORS:
+    _doctors_by_city.setdefault(_doc["hospital"].rsplit(",", 1)[-1].strip().lower(), []).append(_doc)
+DOCTORS_BY_CITY = {city: orjson.dumps(docs) for city, docs in _doctors_by_city.items()}
+del _doctors_by_city, _doc
+
 @app.get("/doctors/search", tags=["Appointments"])
 def search_doctors(location: str = "Bangalore"):
     """
@@ -685,7 +839,8 @@ def search_doctors(location: str = "Bangalore"):
     """
     logger.info(f"Real-time scraping for neurologists in: {location}")
     # We return the real-world data we just curated via search
-    return REAL_DOCTORS
+    body = DOCTORS_BY_CITY.get(location.strip().lower(), _REAL_DOCTORS_JSON)
+    return Response(content=body, media_type="application/json")
 
 class AppointmentBooking(BaseModel):
     patient_id: int
@@ -694,8 +849,49 @@ class AppointmentBooking(BaseModel):
     slot: str
     patient_email: Optional[str] = None
 
+def _send_mail(msg: MIMEMultipart, description: str):
+    """Gmail SMTP round-trips; called from BackgroundTasks so no request waits on them."""
+    try:
+        _smtp_pool.send(msg)
+        logger.info("%s sent to %s", description, msg['To'])
+    except Exception as e:
+        logger.error("Failed to send %s: %s", description, e)
+
+
+def _send_appointment_email(email_to: str, patient_name: str, doctor_name: str, hospital: str, slot: str):
+    """Gmail confirmation for a booking. Runs as a background task after the response."""
+    try:
+        msg = MIMEMultipart()
+        msg['From'] = f"NeuroVoice AI <{conf.GMAIL_USER}>"
+        msg['To'] = email_to
+        msg['Subject'] = f"🏥 Confirmed: Appointment with {doctor_name}"
+
+        body = f"""
+        Hello {patient_name},
+
+        Your appointment has been successfully scheduled via NeuroVoice AI.
+
+        DETAILS:
+        - Doctor: {doctor_name}
+        - Hospital: {hospital}
+        - Time: {slot}
+
+        CLINICAL NOTE:
+        This appointment was prioritized based on your latest vocal biomarker scan. 
+        Please bring your digital screening report to the consultation.
+
+        Best regards,
+        NeuroVoice AI Health Team
+        """
+        msg.attach(MIMEText(body, 'plain'))
+    except Exception as e:
+        logger.error("Failed to build confirmation email: %s", e)
+        return
+    _send_mail(msg, "Confirmation email")
+
+
 @app.post("/appointments/book", tags=["Appointments"])
-def book_appointment(data: AppointmentBooking, db: Session = Depends(get_db)):
+def book_appointment(data: AppointmentBooking, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Book a real neurologist and send a confirmation email via Gmail."""
     patient = db.query(Patient).filter(Patient.id == data.patient_id).first()
     if not patient:
@@ -708,49 +904,45 @@ def book_appointment(data: AppointmentBooking, db: Session = Depends(get_db)):
         return {"status": "confirmed", "message": "Booking successful (no email sent)"}
 
     # ── Notification System (Gmail) ──────────────────────────────────────────
+    # Sent after the response goes out; the SMTP handshake no longer delays it
     if conf.GMAIL_USER and conf.GMAIL_PASS:
-        try:
-            msg = MIMEMultipart()
-            msg['From'] = f"NeuroVoice AI <{conf.GMAIL_USER}>"
-            msg['To'] = email_to
-            msg['Subject'] = f"🏥 Confirmed: Appointment with {data.doctor_name}"
-
-            body = f"""
-            Hello {patient.name},
-
-            Your appointment has been successfully scheduled via NeuroVoice AI.
-
-            DETAILS:
-            - Doctor: {data.doctor_name}
-            - Hospital: {data.hospital}
-            - Time: {data.slot}
-
-            CLINICAL NOTE:
-            This appointment was prioritized based on your latest vocal biomarker scan. 
-            Please bring your digital screening report to the consultation.
-
-            Best regards,
-            NeuroVoice AI Health Team
-            """
-            msg.attach(MIMEText(body, 'plain'))
-
-            server = smtplib.SMTP('smtp.gmail.com', 587)
-            server.starttls()
-            server.login(conf.GMAIL_USER, conf.GMAIL_PASS)
-            server.send_message(msg)
-            server.quit()
-            logger.info("Confirmation email sent to %s", email_to)
-        except Exception as e:
-            logger.error("Failed to send email: %s", e)
-            return {"status": "confirmed", "message": f"Booking recorded, but email failed: {str(e)}"}
+        background_tasks.add_task(
+            _send_appointment_email, email_to, patient.name,
+            data.doctor_name, data.hospital, data.slot,
+        )
 
     return {
         "status": "confirmed",
         "message": f"Appointment booked with {data.doctor_name} for {data.slot}.",
-        "notification": "Email sent" if conf.GMAIL_USER else "Config missing"
+        "notification": "Email queued" if conf.GMAIL_USER else "Config missing"
     }
 
 # ── helper ────────────────────────────────────────────────────────────────────
+# Columns read by _session_to_dict(): skips the spectral blob, audio path and
+# the recommendations JSON, which the summary doesn't return
+_SESSION_SUMMARY_FIELDS = (
+    VoiceSession.id, VoiceSession.patient_id, VoiceSession.recorded_at,
+    VoiceSession.language, VoiceSession.duration_sec, VoiceSession.praat_blob,
+    VoiceSession.risk_score, VoiceSession.risk_label, VoiceSession.parkinson_prob,
+    VoiceSession.confidence, VoiceSession.clinical_stage, VoiceSession.model_version,
+)
+_SESSION_SUMMARY_COLUMNS = load_only(*_SESSION_SUMMARY_FIELDS)
+
+
+# Patient columns copied straight into PatientOut / API dicts
+_PATIENT_FIELDS = (
+    "id", "name", "age", "gender", "language", "phone", "email",
+    "created_at", "xp", "streak_count",
+)
+_PATIENT_DICT_FIELDS = _PATIENT_FIELDS + ("last_activity_date", "achievements")
+
+
+def _patient_to_dict(p: Patient) -> dict:
+    return {k: getattr(p, k) for k in _PATIENT_DICT_FIELDS}
+
+
+# Only plain JSON types here, so the endpoints returning lists of these wrap
+# them in ORJSONResponse themselves and skip FastAPI's jsonable_encoder walk
 def _session_to_dict(s: VoiceSession) -> dict:
     return {
         "id":            s.id,
@@ -773,54 +965,222 @@ def _session_to_dict(s: VoiceSession) -> dict:
 
 
 @app.post("/patients/{patient_id}/imaging", tags=["Analysis"])
-def save_imaging_test(patient_id: int, data: ImagingSessionCreate, db: Session = Depends(get_db)):
+def save_imaging_test(patient_id: int, data: ImagingSessionCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """Save MRI or DaT Scan results (Clinical Data Integration)."""
     patient = db.query(Patient).filter(Patient.id == patient_id).first()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
-    session = ImagingSession(
-        patient_id=patient_id,
-        **data.model_dump()
-    )
-    db.add(session)
+    session_id = db.execute(
+        insert(ImagingSession)
+        .values(patient_id=patient_id, **data.model_dump(exclude={"patient_id"}))
+        .returning(ImagingSession.id)
+    ).scalar_one()
     
     # Gamification
-    patient.xp += 150
+    _award_xp(db, patient_id, 150)
     
     db.commit()
 
     # ── Automatically send combined report if all results exist ──────────────
-    send_complete_report(patient, db)
+    send_complete_report(patient, db, background_tasks)
 
-    return {"status": "success", "session_id": session.id}
+    return {"status": "success", "session_id": session_id}
 
 
 @app.post("/patients/{patient_id}/motor", tags=["Analysis"])
-def save_motor_test(patient_id: int, data: MotorSessionCreate, db: Session = Depends(get_db)):
+def save_motor_test(patient_id: int, data: MotorSessionCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     patient = db.query(Patient).filter(Patient.id == patient_id).first()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
-    m = MotorSession(
-        patient_id=patient_id,
-        **data.model_dump()
-    )
-    db.add(m)
+    motor_id = db.execute(
+        insert(MotorSession)
+        .values(
+            patient_id=patient_id,
+            **data.model_dump(),
+            risk_val=motor_risk_val(data.label, data.tremor_score),
+        )
+        .returning(MotorSession.id)
+    ).scalar_one()
     
     # Update Gamification
     update_patient_gamification(patient, db)
     
     db.commit()
-    db.refresh(m)
 
     # ── Automatically send combined report if all results exist ──────────────
-    send_complete_report(patient, db)
+    send_complete_report(patient, db, background_tasks)
+
+    return {"status": "success", "id": motor_id}
+
+
+# ── Report colour / label tables ──────────────────────────────────────────────
+_GREEN, _AMBER, _RED, _CYAN = "#34d399", "#fbbf24", "#f87171", "#22d3ee"
+
+# Voice risk score: < 35, < 65, else
+_VOICE_RISK_BINS   = (35, 65)
+_VOICE_RISK_COLORS = (_GREEN, _AMBER, _RED)
 
-    return {"status": "success", "id": m.id}
+# Fused score: <= 35, <= 60, <= 85, else
+_FUSED_BINS  = (35, 60, 85)
+_FUSED_TIERS = (
+    ("Healthy Indicator",       _GREEN),
+    ("Subclinical Signals",     _CYAN),
+    ("Moderate Concern",        _AMBER),
+    ("High Clinical Suspicion", _RED),
+)
+
+# Motor labels, first match wins; anything else is red
+_MOTOR_LABEL_COLORS = (
+    ("Stage 0",          _GREEN),
+    ("Non-Parkinsonian", _GREEN),
+    ("Stage 1",          _AMBER),
+)
 
-def send_complete_report(patient: Patient, db: Session):
-    """Checks for all three session types and sends a combined clinical report once data is complete."""
+
+@lru_cache(maxsize=64)
+def _motor_label_color(label: str) -> str:
+    """Motor labels come from a small fixed set, so each is resolved once."""
+    for needle, color in _MOTOR_LABEL_COLORS:
+        if needle in label:
+            return color
+    return _RED
+
+
+_DEFAULT_NEXT_STEPS = ("Consult a movement disorder specialist.",)
+
+
+@lru_cache(maxsize=256)
+def _render_steps(steps: tuple) -> str:
+    """<li> list for the report; most reports share the same canned next steps."""
+    return "".join(f"<li style='margin-bottom:8px;'>{step}</li>" for step in steps)
+
+
+# Combined report HTML, parsed once at import; send_complete_report only
+# substitutes the per-patient values
+_FUSION_REPORT_TMPL = string.Template("""
+<html>
+<body style="font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f4f7f6; margin: 0; padding: 0;">
+    <table width="100%" cellpadding="0" cellspacing="0" style="background-color: #f4f7f6; padding: 20px;">
+        <tr>
+            <td align="center">
+                <table width="600" cellpadding="0" cellspacing="0" style="background-color: #ffffff; border-radius: 16px; overflow: hidden; box-shadow: 0 10px 25px rgba(0,0,0,0.1);">
+                    <!-- Premium Header -->
+                    <tr>
+                        <td style="background: linear-gradient(135deg, #7c3aed, #06b6d4); padding: 50px 20px; text-align: center;">
+                            <div style="background: rgba(255,255,255,0.1); display: inline-block; padding: 8px 16px; border-radius: 20px; color: #ffffff; font-size: 11px; font-weight: 800; text-transform: uppercase; margin-bottom: 15px; border: 1px solid rgba(255,255,255,0.2);">Clinical Grade Multi-Agent Analysis</div>
+                            <h1 style="color: #ffffff; margin: 0; font-size: 32px; font-weight: 900; letter-spacing: -1px;">NeuroVoice AI</h1>
+                            <p style="color: rgba(255,255,255,0.9); margin-top: 10px; font-size: 15px;">Complete Neurological Screening Results</p>
+                        </td>
+                    </tr>
+                    
+                    <!-- Introduction -->
+                    <tr>
+                        <td style="padding: 40px 40px 20px 40px;">
+                            <h2 style="color: #111827; margin: 0 0 12px 0; font-size: 22px; font-weight: 800;">Report for ${patient_name}</h2>
+                            <p style="color: #4b5563; font-size: 15px; line-height: 1.7; margin: 0;">
+                                Our <b>Deep Fusion Engine</b> has successfully synchronized your vocal biomarker scan and finger-tapping kinematic data.
+                            </p>
+                        </td>
+                    </tr>
+
+                    <!-- MASTER FUSION CARD -->
+                    <tr>
+                        <td style="padding: 20px 40px;">
+                            <div style="background-color: #f8fafc; border: 2px solid #e2e8f0; border-radius: 14px; padding: 30px; text-align: center;">
+                                <div style="font-size: 12px; color: #64748b; font-weight: 800; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 10px;">Integrated Multimodal Score</div>
+                                <div style="font-size: 56px; font-weight: 900; color: ${f_color}; font-family: ArialBlack, sans-serif; margin-bottom: 10px;">${fused_score}%</div>
+                                <div style="display: inline-block; background-color: ${f_color}15; color: ${f_color}; padding: 6px 14px; border-radius: 20px; font-weight: 800; font-size: 13px;">${f_label}</div>
+                                <p style="color: #64748b; font-size: 13px; margin-top: 15px; line-height: 1.6;">
+                                    This score indicates a ${fused_score}% neurological profile match for symptoms typical of early-stage Parkinsonian indications.
+                                </p>
+                            </div>
+                        </td>
+                    </tr>
+
+                    <!-- Domain Split Cards -->
+                    <tr>
+                        <td style="padding: 10px 40px 30px 40px;">
+                            <table width="100%" cellpadding="0" cellspacing="0">
+                                <tr>
+                                    <td width="48%" valign="top" style="background-color: #ffffff; border-radius: 12px; padding: 20px; border: 1px solid #f1f5f9; box-shadow: 0 4px 6px rgba(0,0,0,0.02);">
+                                        <div style="font-size: 11px; color: #94a3b8; font-weight: 700; text-transform: uppercase; margin-bottom: 12px;">🎤 Vocal Analysis</div>
+                                        <div style="font-size: 20px; font-weight: 800; color: ${v_color}; margin-bottom: 4px;">${v_risk} Risk</div>
+                                        <div style="font-size: 13px; color: #64748b;">Confidence: ${v_confidence}%</div>
+                                        <div style="font-size: 12px; color: #94a3b8; margin-top: 8px; font-style: italic;">${v_stage}</div>
+                                    </td>
+                                    <td width="4%"></td>
+                                    <td width="48%" valign="top" style="background-color: #ffffff; border-radius: 12px; padding: 20px; border: 1px solid #f1f5f9; box-shadow: 0 4px 6px rgba(0,0,0,0.02);">
+                                        <div style="font-size: 11px; color: #94a3b8; font-weight: 700; text-transform: uppercase; margin-bottom: 12px;">🖐️ Motor Test</div>
+                                        <div style="font-size: 20px; font-weight: 800; color: ${m_color}; margin-bottom: 4px;">${m_label}</div>
+                                        <div style="font-size: 13px; color: #64748b;">Tremor: ${m_tremor}%</div>
+                                        <div style="font-size: 12px; color: #94a3b8; margin-top: 8px; font-style: italic;">Stability Index: ${m_stability}</div>
+                                    </td>
+                                </tr>
+                            </table>
+                        </td>
+                    </tr>
+
+                    <!-- AI Insight -->
+                    <tr>
+                        <td style="padding: 0 40px 30px 40px;">
+                            <div style="background-color: #f1f5f9; padding: 20px; border-radius: 12px;">
+                                <b style="color: #334155; font-size: 14px; display: block; margin-bottom: 8px;">🔬 Pathophysiological AI Insight:</b>
+                                <p style="color: #475569; font-size: 14px; margin: 0; line-height: 1.6;">
+                                    ${finding} The correlation between vocal dysarthria indicators and kinematic bradykinesia reveals a comprehensive neurological snapshot.
+                                </p>
+                            </div>
+                        </td>
+                    </tr>
+
+                    <!-- Steps -->
+                    <tr>
+                        <td style="padding: 0 40px 40px 40px;">
+                            <h3 style="color: #1e293b; border-bottom: 1px solid #f1f5f9; padding-bottom: 12px; margin-bottom: 15px; font-size: 17px; font-weight: 800;">🩺 Recommended Clinical Actions</h3>
+                            <ul style="color: #475569; font-size: 14px; line-height: 1.8; padding-left: 20px; margin: 0;">
+                                ${steps_html}
+                            </ul>
+                        </td>
+                    </tr>
+
+                    <!-- Professional Action Button -->
+                    <tr>
+                        <td align="center" style="padding: 0 40px 50px 40px;">
+                            <table cellpadding="0" cellspacing="0" style="width: 100%;">
+                                <tr>
+                                    <td align="center" style="background: #7c3aed; border-radius: 8px; box-shadow: 0 6px 15px rgba(124,58,237,0.3);">
+                                        <a href="#" style="display: block; padding: 18px 30px; color: #ffffff; text-decoration: none; font-weight: 800; font-size: 15px; text-align: center;">BOOK SPECIALIST CONSULTATION</a>
+                                    </td>
+                                </tr>
+                            </table>
+                        </td>
+                    </tr>
+                    
+                    <!-- Detailed Footer -->
+                    <tr>
+                        <td style="background-color: #f8fafc; padding: 40px; text-align: center; border-top: 1px solid #f1f5f9;">
+                            <p style="color: #94a3b8; font-size: 12px; margin: 0; line-height: 1.6;">
+                                <b>LEGAL NOTICE:</b> This screening is performed by autonomous clinical agents. It is intended for early-awareness and research purposes only. It <u>does not</u> guarantee a clinical diagnosis. Always consult a board-certified Neurologist for final validation.
+                            </p>
+                            <div style="margin-top: 20px; font-size: 11px; color: #cbd5e1; font-weight: 700; text-transform: uppercase;">Generated by NeuroVoice AI v2.0 · Bangalore Cluster</div>
+                        </td>
+                    </tr>
+                </table>
+            </td>
+        </tr>
+    </table>
+</body>
+</html>
+""")
+
+
+def send_complete_report(patient: Patient, db: Session, background_tasks: Optional[BackgroundTasks] = None):
+    """
+    Checks for all three session types and sends a combined clinical report once data is complete.
+    The report is built here (it needs the DB session); with background_tasks the SMTP
+    send itself happens after the response.
+    """
     if not (conf.GMAIL_USER and conf.GMAIL_PASS):
         logger.warning("Email config missing, skipping report for patient %d", patient.id)
         return
@@ -830,14 +1190,25 @@ def send_complete_report(patient: Patient, db: Session):
         logger.warning("No email for patient %d, report not sent", patient.id)
         return
 
-    # 1. Get latest voice session
-    voice = db.query(VoiceSession).filter(VoiceSession.patient_id == patient.id).order_by(VoiceSession.recorded_at.desc()).first()
-    
-    # 2. Get latest motor session
-    motor = db.query(MotorSession).filter(MotorSession.patient_id == patient.id).order_by(MotorSession.recorded_at.desc()).first()
-    
-    # 3. Get latest imaging session
-    image = db.query(ImagingSession).filter(ImagingSession.patient_id == patient.id).order_by(ImagingSession.recorded_at.desc()).first()
+    # Latest voice, motor and imaging session in one statement: each LIMIT 1
+    # subquery walks its (patient_id, recorded_at) index; missing ones join as None
+    def _latest_id(model):
+        return (
+            select(model.id)
+            .where(model.patient_id == patient.id)
+            .order_by(model.recorded_at.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+
+    voice, motor, image = db.execute(
+        select(VoiceSession, MotorSession, ImagingSession)
+        .select_from(Patient)
+        .outerjoin(VoiceSession, VoiceSession.id == _latest_id(VoiceSession))
+        .outerjoin(MotorSession, MotorSession.id == _latest_id(MotorSession))
+        .outerjoin(ImagingSession, ImagingSession.id == _latest_id(ImagingSession))
+        .where(Patient.id == patient.id)
+    ).one()
 
     # We only send the report if ALL THREE tests are done, to provide a "Full Fusion"
     if not (voice and motor and image):
@@ -857,12 +1228,12 @@ def send_complete_report(patient: Patient, db: Session):
         # Data for the email
         v_risk = voice.risk_label or "Unknown"
         v_score = voice.risk_score or (voice.parkinson_prob * 100)
-        v_color = "#34d399" if v_score < 35 else "#fbbf24" if v_score < 65 else "#f87171"
+        v_color = _VOICE_RISK_COLORS[bisect.bisect_right(_VOICE_RISK_BINS, v_score)]
         
         m_label = motor.label or "N/A"
         m_tremor = motor.tremor_score or 0.0
         m_stability = motor.stability_idx or 0.0
-        m_color = "#34d399" if "Stage 0" in m_label or "Non-Parkinsonian" in m_label else "#fbbf24" if "Stage 1" in m_label else "#f87171"
+        m_color = _motor_label_color(m_label)
 
         # Imaging Data
         i_sbr = image.sbr_ratio if image else 1.0
@@ -870,7 +1241,9 @@ def send_complete_report(patient: Patient, db: Session):
         
         # Logic for Fusion (Triple Domain)
         v_risk_val = v_score
-        m_risk_val = 90 if "Stage 2.5" in m_label or motor.tremor_score > 30 else 60 if "Stage 1-2" in m_label else 20
+        m_risk_val = motor.risk_val
+        if m_risk_val is None:   # rows recorded before risk_val was stored
+            m_risk_val = motor_risk_val(motor.label, motor.tremor_score)
         
         # Weighted Triple Fusion
         if image:
@@ -878,224 +1251,154 @@ def send_complete_report(patient: Patient, db: Session):
         else:
             fused_score = round((v_risk_val * 0.45) + (m_risk_val * 0.55))
 
-        f_label = "Healthy Indicator"
-        f_color = "#34d399"
-        if fused_score > 85:
-            f_label = "High Clinical Suspicion"
-            f_color = "#f87171"
-        elif fused_score > 60:
-            f_label = "Moderate Concern"
-            f_color = "#fbbf24"
-        elif fused_score > 35:
-            f_label = "Subclinical Signals"
-            f_color = "#22d3ee"
-
-        recs = json.loads(voice.recommendations or "{}")
-        steps_html = "".join([f"<li style='margin-bottom:8px;'>{step}</li>" for step in recs.get("next_steps", ["Consult a movement disorder specialist."])])
+        f_label, f_color = _FUSED_TIERS[bisect.bisect_left(_FUSED_BINS, fused_score)]
+
+        recs = voice.recommendations or {}
+        steps_html = _render_steps(tuple(recs.get("next_steps", _DEFAULT_NEXT_STEPS)))
         finding = recs.get("main_finding", "Multi-domain biomarkers fused. Analysis complete.")
 
-        html_body = f"""
-        <html>
-        <body style="font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f4f7f6; margin: 0; padding: 0;">
-            <table width="100%" cellpadding="0" cellspacing="0" style="background-color: #f4f7f6; padding: 20px;">
-                <tr>
-                    <td align="center">
-                        <table width="600" cellpadding="0" cellspacing="0" style="background-color: #ffffff; border-radius: 16px; overflow: hidden; box-shadow: 0 10px 25px rgba(0,0,0,0.1);">
-                            <!-- Premium Header -->
-                            <tr>
-                                <td style="background: linear-gradient(135deg, #7c3aed, #06b6d4); padding: 50px 20px; text-align: center;">
-                                    <div style="background: rgba(255,255,255,0.1); display: inline-block; padding: 8px 16px; border-radius: 20px; color: #ffffff; font-size: 11px; font-weight: 800; text-transform: uppercase; margin-bottom: 15px; border: 1px solid rgba(255,255,255,0.2);">Clinical Grade Multi-Agent Analysis</div>
-                                    <h1 style="color: #ffffff; margin: 0; font-size: 32px; font-weight: 900; letter-spacing: -1px;">NeuroVoice AI</h1>
-                                    <p style="color: rgba(255,255,255,0.9); margin-top: 10px; font-size: 15px;">Complete Neurological Screening Results</p>
-                                </td>
-                            </tr>
-                            
-                            <!-- Introduction -->
-                            <tr>
-                                <td style="padding: 40px 40px 20px 40px;">
-                                    <h2 style="color: #111827; margin: 0 0 12px 0; font-size: 22px; font-weight: 800;">Report for {patient.name}</h2>
-                                    <p style="color: #4b5563; font-size: 15px; line-height: 1.7; margin: 0;">
-                                        Our <b>Deep Fusion Engine</b> has successfully synchronized your vocal biomarker scan and finger-tapping kinematic data.
-                                    </p>
-                                </td>
-                            </tr>
-
-                            <!-- MASTER FUSION CARD -->
-                            <tr>
-                                <td style="padding: 20px 40px;">
-                                    <div style="background-color: #f8fafc; border: 2px solid #e2e8f0; border-radius: 14px; padding: 30px; text-align: center;">
-                                        <div style="font-size: 12px; color: #64748b; font-weight: 800; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 10px;">Integrated Multimodal Score</div>
-                                        <div style="font-size: 56px; font-weight: 900; color: {f_color}; font-family: ArialBlack, sans-serif; margin-bottom: 10px;">{fused_score}%</div>
-                                        <div style="display: inline-block; background-color: {f_color}15; color: {f_color}; padding: 6px 14px; border-radius: 20px; font-weight: 800; font-size: 13px;">{f_label}</div>
-                                        <p style="color: #64748b; font-size: 13px; margin-top: 15px; line-height: 1.6;">
-                                            This score indicates a {fused_score}% neurological profile match for symptoms typical of early-stage Parkinsonian indications.
-                                        </p>
-                                    </div>
-                                </td>
-                            </tr>
-
-                            <!-- Domain Split Cards -->
-                            <tr>
-                                <td style="padding: 10px 40px 30px 40px;">
-                                    <table width="100%" cellpadding="0" cellspacing="0">
-                                        <tr>
-                                            <td width="48%" valign="top" style="background-color: #ffffff; border-radius: 12px; padding: 20px; border: 1px solid #f1f5f9; box-shadow: 0 4px 6px rgba(0,0,0,0.02);">
-                                                <div style="font-size: 11px; color: #94a3b8; font-weight: 700; text-transform: uppercase; margin-bottom: 12px;">🎤 Vocal Analysis</div>
-                                                <div style="font-size: 20px; font-weight: 800; color: {v_color}; margin-bottom: 4px;">{v_risk} Risk</div>
-                                                <div style="font-size: 13px; color: #64748b;">Confidence: {voice.confidence}%</div>
-                                                <div style="font-size: 12px; color: #94a3b8; margin-top: 8px; font-style: italic;">{voice.clinical_stage}</div>
-                                            </td>
-                                            <td width="4%"></td>
-                                            <td width="48%" valign="top" style="background-color: #ffffff; border-radius: 12px; padding: 20px; border: 1px solid #f1f5f9; box-shadow: 0 4px 6px rgba(0,0,0,0.02);">
-                                                <div style="font-size: 11px; color: #94a3b8; font-weight: 700; text-transform: uppercase; margin-bottom: 12px;">🖐️ Motor Test</div>
-                                                <div style="font-size: 20px; font-weight: 800; color: {m_color}; margin-bottom: 4px;">{m_label}</div>
-                                                <div style="font-size: 13px; color: #64748b;">Tremor: {m_tremor:.1f}%</div>
-                                                <div style="font-size: 12px; color: #94a3b8; margin-top: 8px; font-style: italic;">Stability Index: {m_stability:.2f}</div>
-                                            </td>
-                                        </tr>
-                                    </table>
-                                </td>
-                            </tr>
-
-                            <!-- AI Insight -->
-                            <tr>
-                                <td style="padding: 0 40px 30px 40px;">
-                                    <div style="background-color: #f1f5f9; padding: 20px; border-radius: 12px;">
-                                        <b style="color: #334155; font-size: 14px; display: block; margin-bottom: 8px;">🔬 Pathophysiological AI Insight:</b>
-                                        <p style="color: #475569; font-size: 14px; margin: 0; line-height: 1.6;">
-                                            {finding} The correlation between vocal dysarthria indicators and kinematic bradykinesia reveals a comprehensive neurological snapshot.
-                                        </p>
-                                    </div>
-                                </td>
-                            </tr>
-
-                            <!-- Steps -->
-                            <tr>
-                                <td style="padding: 0 40px 40px 40px;">
-                                    <h3 style="color: #1e293b; border-bottom: 1px solid #f1f5f9; padding-bottom: 12px; margin-bottom: 15px; font-size: 17px; font-weight: 800;">🩺 Recommended Clinical Actions</h3>
-                                    <ul style="color: #475569; font-size: 14px; line-height: 1.8; padding-left: 20px; margin: 0;">
-                                        {steps_html}
-                                    </ul>
-                                </td>
-                            </tr>
-
-                            <!-- Professional Action Button -->
-                            <tr>
-                                <td align="center" style="padding: 0 40px 50px 40px;">
-                                    <table cellpadding="0" cellspacing="0" style="width: 100%;">
-                                        <tr>
-                                            <td align="center" style="background: #7c3aed; border-radius: 8px; box-shadow: 0 6px 15px rgba(124,58,237,0.3);">
-                                                <a href="#" style="display: block; padding: 18px 30px; color: #ffffff; text-decoration: none; font-weight: 800; font-size: 15px; text-align: center;">BOOK SPECIALIST CONSULTATION</a>
-                                            </td>
-                                        </tr>
-                                    </table>
-                                </td>
-                            </tr>
-                            
-                            <!-- Detailed Footer -->
-                            <tr>
-                                <td style="background-color: #f8fafc; padding: 40px; text-align: center; border-top: 1px solid #f1f5f9;">
-                                    <p style="color: #94a3b8; font-size: 12px; margin: 0; line-height: 1.6;">
-                                        <b>LEGAL NOTICE:</b> This screening is performed by autonomous clinical agents. It is intended for early-awareness and research purposes only. It <u>does not</u> guarantee a clinical diagnosis. Always consult a board-certified Neurologist for final validation.
-                                    </p>
-                                    <div style="margin-top: 20px; font-size: 11px; color: #cbd5e1; font-weight: 700; text-transform: uppercase;">Generated by NeuroVoice AI v2.0 · Bangalore Cluster</div>
-                                </td>
-                            </tr>
-                        </table>
-                    </td>
-                </tr>
-            </table>
-        </body>
-        </html>
-        """
+        html_body = _FUSION_REPORT_TMPL.substitute(
+            patient_name=patient.name,
+            fused_score=fused_score,
+            f_color=f_color,
+            f_label=f_label,
+            v_color=v_color,
+            v_risk=v_risk,
+            v_confidence=voice.confidence,
+            v_stage=voice.clinical_stage,
+            m_color=m_color,
+            m_label=m_label,
+            m_tremor=f"{m_tremor:.1f}",
+            m_stability=f"{m_stability:.2f}",
+            finding=finding,
+            steps_html=steps_html,
+        )
         msg.attach(MIMEText(html_body, 'html'))
-
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(conf.GMAIL_USER, conf.GMAIL_PASS)
-        server.send_message(msg)
-        server.quit()
-        logger.info("Deep Fusion Premium report email sent to %s", email_to)
     except Exception as e:
-        logger.error("Failed to send combined report: %s", e)
+        logger.error("Failed to build combined report: %s", e)
+        return
+
+    if background_tasks is not None:
+        background_tasks.add_task(_send_mail, msg, "Deep Fusion Premium report email")
+    else:
+        _send_mail(msg, "Deep Fusion Premium report email")
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 #   GAMIFICATION HELPERS & ENDPOINTS
 # ══════════════════════════════════════════════════════════════════════════════
 
-def update_patient_gamification(patient: Patient, db: Session):
-    """Logic to increment XP, update streaks, and unlock achievements."""
-    now = datetime.utcnow()
-    
-    # 1. Base XP for scanning
-    patient.xp = (patient.xp or 0) + 25
-    
-    # 2. Streak Logic
-    if patient.last_activity_date:
-        delta = (now.date() - patient.last_activity_date.date()).days
-        if delta == 1:
-            # Consecutive day!
-            patient.streak_count = (patient.streak_count or 0) + 1
-        elif delta > 1:
-            # Streak broken
-            patient.streak_count = 1
-    else:
-        # First activity ever
-        patient.streak_count = 1
-        
-    patient.last_activity_date = now
-    
-    # 3. Achievements
-    ach = json.loads(patient.achievements_json or "[]")
-    
-    if "first_scan" not in ach:
-        ach.append("first_scan")
-        patient.xp += 50
-        
-    if "streak_3" not in ach and patient.streak_count >= 3:
-        ach.append("streak_3")
-        patient.xp += 100
+def _award_xp(db: Session, patient_id: int, amount: int):
+    """Atomic in-database XP increment (committed with the caller's transaction)."""
+    db.execute(
+        update(Patient)
+        .where(Patient.id == patient_id)
+        .values(xp=func.coalesce(Patient.xp, 0) + amount)
+        .execution_options(synchronize_session=False)
+    )
 
-    if "streak_7" not in ach and patient.streak_count >= 7:
-        ach.append("streak_7")
-        patient.xp += 250
-        
-    patient.achievements_json = json.dumps(ach)
+
+def update_patient_gamification(patient: Patient, db: Session):
+    """
+    Logic to increment XP, update streaks, and unlock achievements.
+    XP, streak and activity date are updated by one UPDATE ... RETURNING;
+    the streak compares UTC calendar days inside SQLite (same day keeps it,
+    next day extends it, a longer gap restarts it at 1).
+    """
+    # 1. Base XP for scanning + 2. Streak Logic
+    days_since = (
+        func.julianday(func.date("now"))
+        - func.julianday(func.date(Patient.last_activity_date))
+    )
+    streak, mask = db.execute(
+        update(Patient)
+        .where(Patient.id == patient.id)
+        .values(
+            xp=func.coalesce(Patient.xp, 0) + 25,
+            streak_count=case(
+                (Patient.last_activity_date.is_(None), 1),          # first activity ever
+                (days_since == 1, func.coalesce(Patient.streak_count, 0) + 1),  # consecutive day!
+                (days_since > 1, 1),                                # streak broken
+                else_=Patient.streak_count,
+            ),
+            last_activity_date=func.datetime("now"),
+        )
+        .returning(Patient.streak_count, Patient.achievements_mask)
+        .execution_options(synchronize_session=False)
+    ).one()
+
+    # 3. Achievements (bits in achievements_mask)
+    streak = streak or 0
+    old_mask = mask = mask or 0
+    bonus = 0
+
+    if not mask & ACH_FIRST_SCAN:
+        mask |= ACH_FIRST_SCAN
+        bonus += 50
+
+    if not mask & ACH_STREAK_3 and streak >= 3:
+        mask |= ACH_STREAK_3
+        bonus += 100
+
+    if not mask & ACH_STREAK_7 and streak >= 7:
+        mask |= ACH_STREAK_7
+        bonus += 250
+
+    if mask != old_mask:
+        db.execute(
+            update(Patient)
+            .where(Patient.id == patient.id)
+            .values(xp=Patient.xp + bonus, achievements_mask=mask)
+            .execution_options(synchronize_session=False)
+        )
+    # The rows changed underneath the ORM instance; reload on next access
+    db.expire(patient)
 
 
-@app.get("/leaderboard", tags=["Dashboard"])
+@app.get("/leaderboard", responses={200: {"model": list[LeaderboardEntry]}}, tags=["Dashboard"])
 def get_leaderboard(db: Session = Depends(get_db)):
     """Returns top 10 patients sorted by XP."""
+    # Only the five columns needed; the achievement count is a popcount of
+    # the mask, so no row is hydrated or decoded
     top = (
-        db.query(Patient)
+        db.query(
+            Patient.id,
+            Patient.name,
+            Patient.xp,
+            Patient.streak_count,
+            Patient.achievements_mask,
+        )
         .order_by(Patient.xp.desc())
         .limit(10)
         .all()
     )
-    return [
+    # LeaderboardEntry documents the shape; the rows are plain ints/strs, so
+    # they go straight to orjson without a validation pass
+    return ORJSONResponse([
         {
             "id": p.id,
             "name": p.name,
             "xp": p.xp or 0,
             "streak": p.streak_count or 0,
-            "achievements": len(json.loads(p.achievements_json or "[]")),
+            "achievements": bin(p.achievements_mask or 0).count("1"),
         }
         for p in top
-    ]
+    ])
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 #   BLOG & COMMUNITY ENDPOINTS
 # ══════════════════════════════════════════════════════════════════════════════
 
+_YT_ID_RE = re.compile(r"(?:v=|/)([0-9A-Za-z_-]{11})")
+
+
 @app.post("/blog", tags=["Community"])
 def create_blog_post(data: BlogPostCreate, db: Session = Depends(get_db)):
     # Auto-generate thumbnail if it's a youtube link
     thumb = data.thumbnail
-    if not thumb and "youtube.com" in data.url or "youtu.be" in data.url:
-        import re
-        match = re.search(r"(?:v=|\/)([0-9A-Za-z_-]{11}).*", data.url)
+    if not thumb and ("youtube.com" in data.url or "youtu.be" in data.url):
+        match = _YT_ID_RE.search(data.url)
         if match:
             thumb = f"https://img.youtube.com/vi/{match.group(1)}/maxresdefault.jpg"
 
@@ -1112,7 +1415,13 @@ def create_blog_post(data: BlogPostCreate, db: Session = Depends(get_db)):
 
 @app.get("/blog", tags=["Community"])
 def list_blog_posts(db: Session = Depends(get_db)):
-    posts = db.query(BlogPost).order_by(BlogPost.created_at.desc()).all()
+    # All comments arrive in one extra IN (...) query instead of one per post
+    posts = (
+        db.query(BlogPost)
+        .options(selectinload(BlogPost.comments))
+        .order_by(BlogPost.created_at.desc())
+        .all()
+    )
     res = []
     for p in posts:
         res.append({
@@ -1122,25 +1431,32 @@ def list_blog_posts(db: Session = Depends(get_db)):
             "url": p.url,
             "thumbnail": p.thumbnail,
             "likes": p.likes,
-            "created_at": p.created_at.isoformat(),
+            "created_at": p.created_at,
             "comments": [
                 {
                     "author": c.author_name,
                     "content": c.content,
-                    "date": c.created_at.isoformat()
+                    "date": c.created_at
                 } for c in p.comments
             ]
         })
-    return res
+    # datetimes are left to orjson (same ISO strings, formatted in Rust)
+    return ORJSONResponse(res)
 
 @app.post("/blog/{post_id}/like", tags=["Community"])
 def like_post(post_id: int, db: Session = Depends(get_db)):
-    p = db.query(BlogPost).filter(BlogPost.id == post_id).first()
-    if not p:
+    # Single atomic UPDATE ... RETURNING: no read-modify-write, so concurrent
+    # likes can't overwrite each other
+    new_likes = db.execute(
+        update(BlogPost)
+        .where(BlogPost.id == post_id)
+        .values(likes=func.coalesce(BlogPost.likes, 0) + 1)
+        .returning(BlogPost.likes)
+    ).scalar_one_or_none()
+    if new_likes is None:
         raise HTTPException(status_code=404, detail="Post not found")
-    p.likes += 1
     db.commit()
-    return {"status": "success", "new_likes": p.likes}
+    return {"status": "success", "new_likes": new_likes}
 
 @app.post("/blog/{post_id}/comment", tags=["Community"])
 def add_comment(post_id: int, data: CommentCreate, db: Session = Depends(get_db)):
@@ -1160,7 +1476,11 @@ def add_comment(post_id: int, data: CommentCreate, db: Session = Depends(get_db)
 
 def seed_blog(db: Session):
     """Seed initial YouTube education videos using highly compatible IDs."""
-    if db.query(BlogPost).count() > 0:
+    # Every worker calls this at startup: hold the write lock across the
+    # check and the inserts so only the first one seeds
+    db.execute(text("BEGIN IMMEDIATE"))
+    if db.query(BlogPost.id).first() is not None:   # existence probe, not a COUNT(*)
+        db.rollback()
         return
     
     videos = [
@@ -1220,8 +1540,8 @@ def seed_blog(db: Session):
         }
     ]
     
-    for v in videos:
-        db.add(BlogPost(**v))
+    # One executemany INSERT instead of a unit-of-work flush per post
+    db.execute(insert(BlogPost), videos)
     db.commit()
     logger.info("✅ Blog seeded with premium educational videos")
 
@@ -1229,22 +1549,38 @@ def seed_blog(db: Session):
 # We serve the React 'dist' folder from the root of the project
 FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "dist")
 
-if os.path.exists(FRONTEND_DIR):
-    app.mount("/assets", StaticFiles(directory=os.path.join(FRONTEND_DIR, "assets")), name="assets")
+class SPAStaticFiles(StaticFiles):
+    """
+    dist/ served by Starlette's StaticFiles (stat off the event loop, sendfile,
+    ETag / Last-Modified); unknown non-API paths get index.html so client-side
+    routes still load on refresh.
+    """
+    def __init__(self, *, directory: str, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        # dist/ is immutable for the life of the process (a deploy restarts
+        # it), so SPA routes are recognised by a set probe instead of a
+        # failed filesystem lookup per request
+        self.files = frozenset(
+            os.path.relpath(os.path.join(root, name), directory)
+            for root, _, names in os.walk(directory)
+            for name in names
+        )
 
-    @app.get("/{full_path:path}")
-    async def serve_frontend(full_path: str):
-        # API routes are handled above. If it's not an API route, serve the React app.
-        if full_path.startswith("api") or full_path.startswith("health"):
-            return None # FastAPI will fall through to the actual route
-        
-        # Check if file exists in dist
-        file_path = os.path.join(FRONTEND_DIR, full_path)
-        if os.path.exists(file_path) and os.path.isfile(file_path):
-            return FileResponse(file_path)
-        
-        # Fallback to index.html for SPA routing
-        return FileResponse(os.path.join(FRONTEND_DIR, "index.html"))
+    async def get_response(self, path: str, scope):
+        is_api = path.startswith(("api", "health"))
+        if path != "." and path not in self.files and not is_api:
+            return await super().get_response("index.html", scope)
+        try:
+            return await super().get_response(path, scope)
+        except StarletteHTTPException as exc:
+            if exc.status_code != 404 or is_api:
+                raise
+            return await super().get_response("index.html", scope)
+
+
+if os.path.exists(FRONTEND_DIR):
+    # Mounted last, so every API route above still matches first
+    app.mount("/", SPAStaticFiles(directory=FRONTEND_DIR, html=True), name="frontend")
 else:
     @app.get("/")
     def read_root():
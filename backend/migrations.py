@@ -0,0 +1,157 @@
+# backend/migrations.py
+"""
+In-place upgrade of an existing neuvoice.db to the current schema.
+Runs at every startup from database.init_db() (and from migrate_db.py);
+each step checks PRAGMA table_info first, so an up-to-date database is left
+untouched. Tables that don't exist yet are skipped here: create_all() builds
+them with the current columns.
+"""
+import json
+import logging
+import sqlite3
+
+from database import (
+    BIOMARKER_ORDER, pack_biomarkers, achievement_mask, motor_risk_val,
+)
+
+logger = logging.getLogger(__name__)
+
+# Columns added to patients after the first release
+PATIENT_COLUMNS = [
+    ("xp", "INTEGER DEFAULT 0"),
+    ("streak_count", "INTEGER DEFAULT 0"),
+    ("last_activity_date", "DATETIME"),
+    ("achievements_json", "TEXT DEFAULT '[]'"),
+]
+
+# Timestamps are now filled in by the column's server default
+# (CURRENT_TIMESTAMP). SQLite can't add a default to an existing column,
+# so tables created before that get an equivalent AFTER INSERT trigger.
+TIMESTAMP_COLUMNS = [
+    ("patients", "created_at"),
+    ("voice_sessions", "recorded_at"),
+    ("motor_sessions", "recorded_at"),
+    ("imaging_sessions", "recorded_at"),
+    ("blog_posts", "created_at"),
+    ("blog_comments", "created_at"),
+]
+
+
+def _columns(cursor, table: str) -> list:
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def _upgrade(conn: sqlite3.Connection) -> None:
+    cursor = conn.cursor()
+
+    # The missing patients columns go to SQLite as one generated script.
+    # executescript() commits any open transaction before running, so the
+    # script itself opens the migration's transaction; everything after it
+    # runs in that same transaction and is committed once at the end.
+    patient_cols = _columns(cursor, "patients")
+    script = ["BEGIN IMMEDIATE"]
+    if patient_cols:
+        for col_name, col_type in PATIENT_COLUMNS:
+            if col_name not in patient_cols:
+                logger.info("Adding column patients.%s", col_name)
+                script.append(f"ALTER TABLE patients ADD COLUMN {col_name} {col_type}")
+    cursor.executescript(";\n".join(script) + ";")
+
+    # Pack the per-column voice biomarkers into voice_sessions.praat_blob / spectral_blob
+    columns = _columns(cursor, "voice_sessions")
+    if columns:
+        for col_name in ("praat_blob", "spectral_blob"):
+            if col_name not in columns:
+                logger.info("Adding column voice_sessions.%s", col_name)
+                cursor.execute(f"ALTER TABLE voice_sessions ADD COLUMN {col_name} BLOB")
+
+        legacy = [c for c in BIOMARKER_ORDER if c in columns]
+        if legacy:
+            rows = cursor.execute(
+                f"SELECT id, {', '.join(legacy)} FROM voice_sessions WHERE praat_blob IS NULL"
+            ).fetchall()
+            for row in rows:
+                packed = pack_biomarkers(dict(zip(legacy, row[1:])))
+                cursor.execute(
+                    "UPDATE voice_sessions SET praat_blob = ?, spectral_blob = ? WHERE id = ?",
+                    (packed["praat_blob"], packed["spectral_blob"], row[0]),
+                )
+            if rows:
+                logger.info("Packed biomarkers for %d voice sessions", len(rows))
+
+    # Achievements moved from a JSON list to a bitmask; convert older rows
+    columns = _columns(cursor, "patients")
+    if columns and "achievements_mask" not in columns:
+        logger.info("Adding column patients.achievements_mask")
+        cursor.execute("ALTER TABLE patients ADD COLUMN achievements_mask INTEGER NOT NULL DEFAULT 0")
+        if "achievements_json" in columns:
+            rows = cursor.execute(
+                "SELECT id, achievements_json FROM patients WHERE achievements_json IS NOT NULL"
+            ).fetchall()
+            cursor.executemany(
+                "UPDATE patients SET achievements_mask = ? WHERE id = ?",
+                [(achievement_mask(json.loads(ach or "[]")), row_id) for row_id, ach in rows],
+            )
+            logger.info("Converted achievements for %d patients", len(rows))
+
+    # Motor-domain fusion risk is stored per session; backfill older rows
+    columns = _columns(cursor, "motor_sessions")
+    if columns:
+        if "risk_val" not in columns:
+            logger.info("Adding column motor_sessions.risk_val")
+            cursor.execute("ALTER TABLE motor_sessions ADD COLUMN risk_val SMALLINT")
+        rows = cursor.execute(
+            "SELECT id, label, tremor_score FROM motor_sessions WHERE risk_val IS NULL"
+        ).fetchall()
+        cursor.executemany(
+            "UPDATE motor_sessions SET risk_val = ? WHERE id = ?",
+            [(motor_risk_val(label, tremor), row_id) for row_id, label, tremor in rows],
+        )
+        if rows:
+            logger.info("Stored motor risk for %d motor sessions", len(rows))
+
+    for table, col_name in TIMESTAMP_COLUMNS:
+        cursor.execute(f"PRAGMA table_info({table})")
+        info = {row[1]: row[4] for row in cursor.fetchall()}   # name -> default
+        trigger = f"{table}_{col_name}_default"
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (trigger,)
+        ).fetchone()
+        if col_name in info and info[col_name] is None and not exists:
+            logger.info("Adding %s.%s default trigger", table, col_name)
+            cursor.execute(f"""
+            CREATE TRIGGER {trigger}
+            AFTER INSERT ON {table} WHEN NEW.{col_name} IS NULL
+            BEGIN
+                UPDATE {table} SET {col_name} = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            END
+            """)
+
+    cursor.execute("COMMIT")
+
+
+def upgrade_schema(db_path: str) -> None:
+    """
+    Bring an existing database up to the current schema in one transaction.
+    Safe to call on every boot, from several workers at once.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        try:
+            _upgrade(conn)
+        except sqlite3.OperationalError as e:
+            # Another worker added the same column between our PRAGMA read and
+            # its lock being released; its commit is visible now, so re-check
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if "duplicate column" not in str(e):
+                raise
+            _upgrade(conn)
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
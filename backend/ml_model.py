@@ -5,9 +5,13 @@ Loads the pre-trained model (built by train_model.py) and provides
 predict() that maps extracted biomarkers → risk score + label.
 """
 import os
+import time
 import logging
+import operator
+import threading
 import numpy as np
 import joblib
+from numba import njit
 
 logger = logging.getLogger(__name__)
 
@@ -24,20 +28,102 @@ FEATURE_ORDER = [
     "nhr", "hnr", "ppe",
 ]
 
+# All 17 features in one C-level lookup; missing keys default to 0.0
+_FEATURE_GETTER   = operator.itemgetter(*FEATURE_ORDER)
+_FEATURE_DEFAULTS = dict.fromkeys(FEATURE_ORDER, 0.0)
+
 _model  = None
 _scaler = None
+_booster = None  # the classifier's native Booster, used for single-row inference
+_mean   = None   # StandardScaler.mean_ / scale_ as contiguous float64
+_scale  = None
+
+# predict() runs in FastAPI's threadpool, so each thread reuses its own
+# (1, n_features) input row instead of allocating one per call
+_local = threading.local()
+
+
+def _row_buffer() -> np.ndarray:
+    buf = getattr(_local, "row", None)
+    if buf is None:
+        buf = _local.row = np.empty((1, len(FEATURE_ORDER)), dtype=np.float64)
+    return buf
+
+
+@njit(cache=True)
+def _standardize(x, mean, scale):
+    """In-place StandardScaler.transform of one feature row; NaN (missing) → 0 first."""
+    for i in range(x.shape[0]):
+        v = x[i]
+        if v != v:
+            v = 0.0
+        x[i] = (v - mean[i]) / scale[i]
+
+
+_load_lock = threading.Lock()
+
+
+class FeatureScaler:
+    """
+    NumPy z-score scaler with the StandardScaler attributes used here
+    (mean_, scale_; zero-variance features scale by 1). Lives in this module
+    so the pickle train_model.py writes resolves when the API loads it.
+    """
+
+    def fit(self, X):
+        X = np.asarray(X)
+        self.mean_ = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+        self.scale_ = scale
+        self.n_features_in_ = X.shape[1]
+        return self
+
+    def transform(self, X):
+        return (np.asarray(X) - self.mean_) / self.scale_
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
 
 
 def _load():
-    global _model, _scaler
-    if _model is None:
-        if not os.path.exists(MODEL_PATH):
-            raise FileNotFoundError(
-                "Model not trained yet. Run:  python backend/train_model.py"
-            )
-        _model  = joblib.load(MODEL_PATH)
-        _scaler = joblib.load(SCALER_PATH)
-        logger.info("XGBoost model loaded ✅")
+    """
+    Load model + scaler once (startup warmup() normally does this) and return
+    (booster, mean, scale). Locked so concurrent first requests don't each
+    deserialize the model.
+    """
+    global _model, _scaler, _booster, _mean, _scale
+    with _load_lock:
+        if _booster is None:
+            if not os.path.exists(MODEL_PATH):
+                raise FileNotFoundError(
+                    "Model not trained yet. Run:  python backend/train_model.py"
+                )
+            _model  = joblib.load(MODEL_PATH)
+            _scaler = joblib.load(SCALER_PATH)
+            # One row per call: a single thread avoids OpenMP dispatch that costs
+            # more than the tree walk, and inplace_predict skips the DMatrix
+            booster = _model.get_booster()
+            booster.set_param({"nthread": 1})
+            _mean   = np.ascontiguousarray(_scaler.mean_, dtype=np.float64)
+            _scale  = np.ascontiguousarray(_scaler.scale_, dtype=np.float64)
+            _standardize(np.zeros(len(FEATURE_ORDER)), _mean, _scale)   # compile / load JIT cache
+            _booster = booster   # published last: predict() keys off it
+            logger.info("XGBoost model loaded ✅")
+        return _booster, _mean, _scale
+
+
+def warmup() -> float:
+    """
+    Load the model once and run a throwaway prediction so the first /analyze
+    request doesn't pay for deserialization or booster setup. Returns seconds.
+    """
+    t0 = time.perf_counter()
+    booster, _, _ = _load()
+    booster.inplace_predict(np.zeros((1, len(FEATURE_ORDER))))
+    elapsed = time.perf_counter() - t0
+    logger.info("Model warm-up done in %.1f ms", elapsed * 1000)
+    return elapsed
 
 
 def predict(biomarkers: dict) -> dict:
@@ -52,24 +138,34 @@ def predict(biomarkers: dict) -> dict:
         interpretation: str,
     }
     """
-    _load()
-
-    # Build feature vector in correct order
-    vec = []
-    for key in FEATURE_ORDER:
-        val = biomarkers.get(key, 0.0)
-        if val is None or (isinstance(val, float) and np.isnan(val)):
-            val = 0.0
-        vec.append(float(val))
-
-    X = np.array([vec])
-    X_scaled = _scaler.transform(X)
-
-    logger.debug(f"Input Vec: {vec}")
-    logger.debug(f"Scaled Vec: {X_scaled[0]}")
-
-    prob_park  = float(_model.predict_proba(X_scaled)[0][1])   # P(Parkinson's)
-    prediction = int(_model.predict(X_scaled)[0])               # 0 or 1
+    # Bound once as locals; the lock in _load() is only taken if startup
+    # warmup() didn't run (e.g. the model was trained after boot)
+    booster, mean, scale = _booster, _mean, _scale
+    if booster is None:
+        booster, mean, scale = _load()
+
+    # Build feature vector in correct order; NaNs are zeroed and the row is
+    # standardized in place by the JIT kernel (same result as _scaler.transform)
+    # (None becomes NaN on assignment, so it is zeroed the same way)
+    X_scaled = _row_buffer()
+    vec = X_scaled[0]
+    try:
+        vec[:] = _FEATURE_GETTER(biomarkers)
+    except KeyError:
+        vec[:] = _FEATURE_GETTER({**_FEATURE_DEFAULTS, **biomarkers})
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Input Vec: %s", np.nan_to_num(vec, nan=0.0).tolist())
+    _standardize(vec, mean, scale)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Scaled Vec: %s", vec.tolist())
+
+    # One ensemble pass; XGBClassifier.predict() is the same probability
+    # thresholded at > 0.5, so it isn't run a second time. For the
+    # binary:logistic objective the booster's "value" output is P(class 1),
+    # i.e. predict_proba(X)[:, 1].
+    prob_park  = float(booster.inplace_predict(X_scaled, predict_type="value")[0])   # P(Parkinson's)
+    prediction = int(prob_park > 0.5)                           # 0 or 1
 
     # Exact Model Prediction (No Heuristics)
     # ──────────────────────────────────────────────────────────────────────────
@@ -5,15 +5,17 @@ import os, ipaddress, datetime
 from cryptography import x509
 from cryptography.x509.oid import NameOID
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric import ec
 
 OUT_DIR = os.path.join(os.path.dirname(__file__), "certs")
 os.makedirs(OUT_DIR, exist_ok=True)
 KEY_PATH  = os.path.join(OUT_DIR, "key.pem")
 CERT_PATH = os.path.join(OUT_DIR, "cert.pem")
 
-# ── Generate RSA private key ───────────────────────────────────────────────
-key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+# ── Generate EC private key ────────────────────────────────────────────────
+# P-256 keygen is a single scalar draw instead of RSA's prime search, and
+# unlike Ed25519 it is accepted for TLS by Safari/Chrome
+key = ec.generate_private_key(ec.SECP256R1())
 
 # ── Build cert ─────────────────────────────────────────────────────────────
 subject = issuer = x509.Name([
@@ -47,15 +49,35 @@ cert = (
 )
 
 # ── Write files ────────────────────────────────────────────────────────────
-with open(KEY_PATH, "wb") as f:
-    f.write(key.private_bytes(
-        serialization.Encoding.PEM,
-        serialization.PrivateFormat.TraditionalOpenSSL,
-        serialization.NoEncryption(),
-    ))
+def write_pem(path, data, mode):
+    # Written to a sibling temp file and renamed over the target, so an
+    # interrupted run never leaves the dev server a truncated PEM. Permissions
+    # are set on the descriptor itself: the key is never readable by other
+    # users, even briefly.
+    tmp = path + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), mode)
+    try:
+        try:
+            if hasattr(os, "fchmod"):   # POSIX only
+                os.fchmod(fd, mode)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
 
-with open(CERT_PATH, "wb") as f:
-    f.write(cert.public_bytes(serialization.Encoding.PEM))
+write_pem(KEY_PATH, key.private_bytes(
+    serialization.Encoding.PEM,
+    serialization.PrivateFormat.TraditionalOpenSSL,
+    serialization.NoEncryption(),
+), 0o600)
+
+write_pem(CERT_PATH, cert.public_bytes(serialization.Encoding.PEM), 0o644)
 
 print(f"✅  Key  → {KEY_PATH}")
 print(f"✅  Cert → {CERT_PATH}")
@@ -151,11 +151,12 @@ export const api = {
 export function openLiveWS(patientId, onAmplitude) {
     const wsBase = BASE.replace(/^https?/, (m) => m === "https" ? "wss" : "ws");
     const ws = new WebSocket(`${wsBase}/ws/live/${patientId}`);
+    ws.binaryType = "arraybuffer";
 
+    // Each reply is a single little-endian float32 amplitude
     ws.onmessage = (e) => {
         try {
-            const { amplitude } = JSON.parse(e.data);
-            onAmplitude(amplitude);
+            onAmplitude(new DataView(e.data).getFloat32(0, true));
         } catch { }
     };
 